@@ -1,13 +1,11 @@
 # flake8: noqa
 # nopycln: file
-import time
+import threading
 
 import patent_client.patches  # noqa # Run patching code
 
 from .version import __version__  # noqa
 
-start = time.time()
-
 from pathlib import Path
 
 from .settings import Settings
@@ -17,47 +15,59 @@ SETTINGS = Settings()
 import logging
 import logging.handlers
 
-# Revert base directory to local if there's an access problem
-
-BASE_DIR = SETTINGS.base_dir
-try:
-    BASE_DIR.mkdir(exist_ok=True, parents=True)
-except OSError:
-    BASE_DIR = Path(__file__).parent.parent.parent / "_build"
-    BASE_DIR.mkdir(exist_ok=True, parents=True)
-    SETTINGS.DEFAULT.BASE_DIR = str(BASE_DIR)
-
-LOG_FILENAME = BASE_DIR / SETTINGS.log_file
-CACHE_DIR = BASE_DIR / "cache"
-CACHE_DIR.mkdir(exist_ok=True, parents=True)
-
 # Set up a specific logger with our desired output level
 logger = logging.getLogger(__name__)
 logger.setLevel(SETTINGS.log_level)
 
+from . import _sync
+
+_configure_lock = threading.Lock()
+_configured = False
+
+
+def configure() -> None:
+    """Create patent_client's directories and attach the log file handler.
 
-# Add the log message handler to the logger
-handler = logging.FileHandler(LOG_FILENAME)
-handler.setFormatter(logging.Formatter("%(asctime)s:%(levelname)s:%(name)s:%(message)s"))
-logger.addHandler(handler)
+    This happens automatically the first time the directories are needed, so there is no
+    need to call it, except to do the work up front, e.g. in a process pool initializer.
+    Calling it again does nothing.
+    """
+    global BASE_DIR, CACHE_DIR, LOG_FILENAME, handler, cache_dir, _configured
+    with _configure_lock:
+        if _configured:
+            return
+        # Revert base directory to local if there's an access problem
+        base_dir = SETTINGS.base_dir
+        try:
+            base_dir.mkdir(exist_ok=True, parents=True)
+        except OSError:
+            base_dir = Path(__file__).parent.parent.parent / "_build"
+            base_dir.mkdir(exist_ok=True, parents=True)
+            SETTINGS.base_dir = base_dir
 
-logger.info(f"Starting Patent Client with log level {SETTINGS.log_level}")
+        CACHE_DIR = base_dir / "cache"
+        CACHE_DIR.mkdir(exist_ok=True, parents=True)
+        LOG_FILENAME = base_dir / SETTINGS.log_file
 
-try:
-    from ._sync import *
-except ImportError:
-    pass
+        # Add the log message handler to the logger
+        handler = logging.FileHandler(LOG_FILENAME)
+        handler.setFormatter(logging.Formatter("%(asctime)s:%(levelname)s:%(name)s:%(message)s"))
+        logger.addHandler(handler)
 
-elapsed = time.time() - start
-logger.info(f"Startup Complete!, took {elapsed:.3f} seconds")
+        cache_dir = Path("~/.patent_client/cache").expanduser()
+        cache_dir.parent.mkdir(exist_ok=True, parents=True)
 
-cache_dir = Path("~/.patent_client/cache").expanduser()
-cache_dir.parent.mkdir(exist_ok=True, parents=True)
+        BASE_DIR = base_dir
+        _configured = True
+    logger.info(f"Starting Patent Client with log level {SETTINGS.log_level}")
+
+
+# Names that are only set once configure() has run
+_configured_names = ("BASE_DIR", "CACHE_DIR", "LOG_FILENAME", "handler", "cache_dir")
 
 __all__ = [
     "Inpadoc",
     "Assignment",
-    "PublicSearch",
     "PublicSearchDocument",
     "Patent",
     "PatentBiblio",
@@ -69,3 +79,19 @@ __all__ = [
     "PtabProceeding",
     "GlobalDossier",
 ]
+
+
+def __getattr__(name: str):
+    if name in _configured_names:
+        configure()
+        return globals()[name]
+    # The API models are imported on first use, see patent_client._sync
+    if name in _sync.__all__:
+        value = getattr(_sync, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_sync.__all__) | set(_configured_names))
@@ -0,0 +1,712 @@
+import datetime
+import json
+import logging
+import re
+import time
+import typing as tp
+import zipfile
+import zlib
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+
+import anysqlite
+import hishel
+import httpx
+from hishel._controller import get_age
+from hishel._headers import parse_cache_control
+from hishel._serializers import BaseSerializer, Metadata
+from hishel._synchronization import AsyncLock
+from hishel._utils import extract_header_values_decoded, header_presents, normalized_url
+from httpcore import URL, Request, Response
+
+from patent_client import SETTINGS, metrics
+from patent_client.settings import CachePolicy
+
+logger = logging.getLogger(__name__)
+
+StoredResponse = tp.Tuple[Response, Request, Metadata]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    url TEXT NOT NULL,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    dictionary_id INTEGER,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at)
+    WHERE expires_at IS NOT NULL;
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    host TEXT NOT NULL UNIQUE,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size (id, bytes) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+    UPDATE cache_size SET bytes = bytes + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+    UPDATE cache_size SET bytes = bytes - OLD.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses BEGIN
+    UPDATE cache_size SET bytes = bytes - OLD.size + NEW.size WHERE id = 0;
+END;
+"""
+
+BUNDLE_VERSION = 1
+
+# zlib can only reference the last 32 KiB of a preset dictionary
+MAX_DICTIONARY_SIZE = 32 * 1024
+
+# How many keys whose responses weren't stored MeteredCacheTransport remembers
+MAX_UNCACHED_KEYS = 1024
+
+
+def get_cache_policy(request: Request) -> tp.Optional[CachePolicy]:
+    """Return the first policy in ``SETTINGS.cache_policies`` that matches the request"""
+    method = request.method.decode("ascii")
+    url = normalized_url(request.url)
+    for policy in SETTINGS.cache_policies:
+        if method in policy.methods and re.search(policy.pattern, url):
+            return policy
+    return None
+
+
+class CacheMissError(Exception):
+    """Raised in offline mode when a request can't be served from the cache"""
+
+    pass
+
+
+class PolicyController(hishel.Controller):
+    """
+    A hishel controller that applies the per-endpoint policies in ``SETTINGS.cache_policies``.
+
+    Requests that match a policy are cached according to that policy's mode, regardless of
+    the response's caching headers. Requests that match no policy fall back to
+    ``default_policy`` if one is given, and to standard HTTP caching semantics otherwise.
+    """
+
+    def __init__(self, default_policy: tp.Optional[CachePolicy] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.default_policy = default_policy
+
+    def get_policy(self, request: Request) -> tp.Optional[CachePolicy]:
+        policy = get_cache_policy(request)
+        if policy is None and self.default_policy is not None:
+            if request.method.decode("ascii") in self.default_policy.methods:
+                return self.default_policy
+        return policy
+
+    def is_cachable(self, request: Request, response: Response) -> bool:
+        policy = self.get_policy(request)
+        if policy is None:
+            return super().is_cachable(request, response)
+        request_cache_control = parse_cache_control(
+            extract_header_values_decoded(request.headers, b"Cache-Control")
+        )
+        return (
+            policy.mode != "no-store"
+            and not request_cache_control.no_store
+            and response.status in self._cacheable_status_codes
+        )
+
+    def construct_response_from_cache(
+        self, request: Request, response: Response, original_request: Request
+    ) -> tp.Union[Response, Request, None]:
+        policy = self.get_policy(request)
+        if policy is None or request.extensions.get("force_cache", False):
+            return super().construct_response_from_cache(request, response, original_request)
+        request_cache_control = parse_cache_control(
+            extract_header_values_decoded(request.headers, b"Cache-Control")
+        )
+        if policy.mode == "no-store":
+            return None
+        if policy.mode == "revalidate" or request_cache_control.no_cache:
+            self._make_request_conditional(request=request, response=response)
+            return request
+        if (
+            policy.mode == "ttl"
+            and policy.ttl is not None
+            and header_presents(response.headers, b"date")
+            and get_age(response, self._clock) >= policy.ttl
+        ):
+            return None
+        return response
+
+
+def to_timestamp(
+    value: tp.Union[datetime.date, datetime.datetime], end_of_day: bool = False
+) -> float:
+    if not isinstance(value, datetime.datetime):
+        if end_of_day:
+            value += datetime.timedelta(days=1)
+        value = datetime.datetime.combine(value, datetime.time.min)
+    return value.timestamp()
+
+
+def document_regex(documents: tp.Sequence[str]) -> tp.Pattern:
+    """Match any of the document numbers, ignoring punctuation, but not as part of a longer number"""
+    numbers = [re.sub(r"[^A-Za-z0-9]", "", str(d)) for d in documents]
+    return re.compile(
+        r"(?<![0-9])(" + "|".join(re.escape(n) for n in numbers) + r")(?![0-9])", re.IGNORECASE
+    )
+
+
+class SQLiteCacheStorage(hishel.AsyncBaseStorage):
+    """
+    A size-bounded hishel storage backed by a single SQLite database.
+
+    Responses are stored in one table keyed by the cache key produced by the
+    controller's key generator. The database runs in WAL mode, so several processes
+    can share one cache file. A running byte total is maintained by triggers, and once
+    it exceeds ``max_bytes`` the least recently used responses are evicted until the
+    cache is back under ``evict_to`` of the budget.
+
+    If ``compress`` is set, response bodies are zlib-compressed before they are written.
+    Responses from one API host share most of their structure (headers, JSON keys, XML
+    tags), so the first response stored for each host is kept as a preset dictionary
+    that later responses from that host are compressed against. Uncompressed and
+    compressed rows can coexist, so compression can be switched on for an existing cache.
+
+    Args:
+        path: Location of the SQLite database file
+        max_bytes: Byte budget for stored responses. If None, the cache is unbounded
+        ttl: Number of seconds a stored response is kept when no cache policy matches the
+            request. If None, responses never expire
+        evict_to: Fraction of ``max_bytes`` that eviction shrinks the cache down to
+        check_ttl_every: How often, in seconds, expired responses are purged
+        serializer: A hishel serializer. Defaults to the JSON serializer
+        compress: Whether to compress newly stored responses
+        compression_level: zlib compression level, from 1 (fastest) to 9 (smallest)
+    """
+
+    def __init__(
+        self,
+        path: tp.Union[str, Path],
+        max_bytes: tp.Optional[int] = None,
+        ttl: tp.Optional[tp.Union[int, float]] = None,
+        evict_to: float = 0.9,
+        check_ttl_every: tp.Union[int, float] = 60,
+        serializer: tp.Optional[BaseSerializer] = None,
+        compress: bool = False,
+        compression_level: int = 6,
+    ):
+        super().__init__(serializer, ttl)
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.evict_to = evict_to
+        self._check_ttl_every = check_ttl_every
+        self._last_cleaned = 0.0
+        self.compress = compress
+        self.compression_level = compression_level
+        self._dictionaries: tp.Dict[tp.Union[int, str], tp.Tuple[int, bytes]] = dict()
+        self._connection = None
+        self._setup_lock = AsyncLock()
+        self._lock = AsyncLock()
+
+    async def _setup(self):
+        async with self._setup_lock:
+            if self._connection is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = await anysqlite.connect(
+                    str(self.path), timeout=30, check_same_thread=False
+                )
+                await connection.execute("PRAGMA journal_mode=WAL")
+                await connection.execute("PRAGMA synchronous=NORMAL")
+                await connection.executescript(SCHEMA)
+                await connection.commit()
+                self._connection = connection
+        return self._connection
+
+    async def store(
+        self, key: str, response: Response, request: Request, metadata: tp.Optional[Metadata] = None
+    ) -> None:
+        metadata = metadata or Metadata(
+            cache_key=key,
+            created_at=datetime.datetime.now(datetime.timezone.utc),
+            number_of_uses=0,
+        )
+        data = self._serializer.dumps(response=response, request=request, metadata=metadata)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        now = time.time()
+        ttl = self._policy_ttl(request)
+        await self._write(
+            key,
+            host=request.url.host.decode("ascii"),
+            url=normalized_url(request.url),
+            data=data,
+            created_at=now,
+            expires_at=now + ttl if ttl is not None else None,
+        )
+        await self._evict()
+
+    async def _write(
+        self,
+        key: str,
+        host: str,
+        url: str,
+        data: bytes,
+        created_at: float,
+        expires_at: tp.Optional[float],
+        replace: bool = True,
+    ) -> bool:
+        """Write a serialized response, compressing it if enabled. Returns whether a row was
+        written, which is False only if ``replace`` is False and the key already exists"""
+        connection = await self._setup()
+        on_conflict = (
+            """DO UPDATE SET
+                    host = excluded.host,
+                    url = excluded.url,
+                    data = excluded.data,
+                    size = excluded.size,
+                    dictionary_id = excluded.dictionary_id,
+                    created_at = excluded.created_at,
+                    accessed_at = excluded.accessed_at,
+                    expires_at = excluded.expires_at"""
+            if replace
+            else "DO NOTHING"
+        )
+        async with self._lock:
+            dictionary_id = None
+            if self.compress:
+                dictionary_id, zdict = await self._get_dictionary(host, sample=data)
+                compressor = zlib.compressobj(self.compression_level, zdict=zdict)
+                data = compressor.compress(data) + compressor.flush()
+            cursor = await connection.execute(
+                f"""
+                INSERT INTO responses
+                    (key, host, url, data, size, dictionary_id, created_at, accessed_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (key) {on_conflict}
+                """,
+                (
+                    key,
+                    host,
+                    url,
+                    data,
+                    len(data),
+                    dictionary_id,
+                    created_at,
+                    time.time(),
+                    expires_at,
+                ),
+            )
+            await connection.commit()
+        return cursor.rowcount > 0
+
+    async def update_metadata(
+        self, key: str, response: Response, request: Request, metadata: Metadata
+    ) -> None:
+        # hishel calls this on every cache hit to bump the use counter. Re-serializing
+        # the whole response for that is wasteful, so a hit only refreshes the LRU clock.
+        connection = await self._setup()
+        async with self._lock:
+            cursor = await connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+            await connection.commit()
+        if cursor.rowcount == 0:
+            await self.store(key, response, request, metadata)
+
+    async def retrieve(self, key: str) -> tp.Optional[StoredResponse]:
+        connection = await self._setup()
+        await self._remove_expired_caches()
+        async with self._lock:
+            cursor = await connection.execute(
+                "SELECT data, dictionary_id FROM responses "
+                "WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time()),
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return None
+            data, dictionary_id = row
+            zdict = await self._get_zdict(dictionary_id)
+        return self._serializer.loads(self._decompress(data, zdict))
+
+    async def size(self) -> int:
+        """Total number of bytes currently held in the cache"""
+        connection = await self._setup()
+        async with self._lock:
+            cursor = await connection.execute("SELECT bytes FROM cache_size WHERE id = 0")
+            row = await cursor.fetchone()
+        return row[0]
+
+    def _policy_ttl(self, request: Request) -> tp.Optional[tp.Union[int, float]]:
+        policy = get_cache_policy(request)
+        if policy is None:
+            return self._ttl
+        elif policy.mode == "immutable":
+            return None
+        return policy.ttl
+
+    async def _get_dictionary(
+        self, id_or_host: tp.Union[int, str], sample: tp.Optional[bytes] = None
+    ) -> tp.Tuple[int, bytes]:
+        """Look up a compression dictionary by id or host, creating a host's dictionary from
+        ``sample`` if it does not have one yet. Must be called while holding the lock."""
+        if id_or_host in self._dictionaries:
+            return self._dictionaries[id_or_host]
+        column = "host" if isinstance(id_or_host, str) else "id"
+        cursor = await self._connection.execute(
+            f"SELECT id, data FROM dictionaries WHERE {column} = ?", (id_or_host,)
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            if sample is None:
+                raise KeyError(f"No compression dictionary found for {id_or_host!r}")
+            # Another process may have created the dictionary in the meantime, so re-read it
+            await self._connection.execute(
+                "INSERT OR IGNORE INTO dictionaries (host, data) VALUES (?, ?)",
+                (id_or_host, sample[-MAX_DICTIONARY_SIZE:]),
+            )
+            cursor = await self._connection.execute(
+                "SELECT id, data FROM dictionaries WHERE host = ?", (id_or_host,)
+            )
+            row = await cursor.fetchone()
+        self._dictionaries[row[0]] = self._dictionaries[id_or_host] = tuple(row)
+        return self._dictionaries[id_or_host]
+
+    async def _get_zdict(self, dictionary_id: tp.Optional[int]) -> tp.Optional[bytes]:
+        """Must be called while holding the lock"""
+        if dictionary_id is None:
+            return None
+        _, zdict = await self._get_dictionary(dictionary_id)
+        return zdict
+
+    @staticmethod
+    def _decompress(data: bytes, zdict: tp.Optional[bytes]) -> bytes:
+        if zdict is None:
+            return data
+        decompressor = zlib.decompressobj(zdict=zdict)
+        return decompressor.decompress(data) + decompressor.flush()
+
+    async def export_bundle(
+        self,
+        path: tp.Union[str, Path],
+        hosts: tp.Optional[tp.Sequence[str]] = None,
+        since: tp.Optional[tp.Union[datetime.date, datetime.datetime]] = None,
+        until: tp.Optional[tp.Union[datetime.date, datetime.datetime]] = None,
+        documents: tp.Optional[tp.Sequence[str]] = None,
+    ) -> int:
+        """Write the selected responses to a portable bundle at ``path``.
+
+        All filters are optional and are combined. Dates select on when a response was
+        cached; a ``date`` for ``until`` includes that whole day. ``documents`` selects
+        responses whose URL contains one of the document numbers, ignoring punctuation, so
+        "US6103599" matches both ".../US-6103599-A" and ".../docdb/US.6103599.A/biblio".
+
+        Bundles are zip files holding the uncompressed serialized responses, so they can be
+        imported into a cache with or without compression. Returns the number of responses
+        exported.
+        """
+        connection = await self._setup()
+        query = (
+            "SELECT key, host, url, data, dictionary_id, created_at, expires_at FROM responses "
+            "WHERE (expires_at IS NULL OR expires_at > ?)"
+        )
+        params: tp.List[tp.Any] = [time.time()]
+        if hosts:
+            query += f" AND host IN ({', '.join('?' for _ in hosts)})"
+            params += list(hosts)
+        if since is not None:
+            query += " AND created_at >= ?"
+            params.append(to_timestamp(since))
+        if until is not None:
+            query += " AND created_at < ?"
+            params.append(to_timestamp(until, end_of_day=True))
+        document_re = document_regex(documents) if documents else None
+        entries = list()
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+            async with self._lock:
+                cursor = await connection.execute(query, params)
+                while rows := await cursor.fetchmany(256):
+                    for key, host, url, data, dictionary_id, created_at, expires_at in rows:
+                        if document_re is not None and not document_re.search(
+                            re.sub(r"[.\-_ ,]", "", url)
+                        ):
+                            continue
+                        zdict = await self._get_zdict(dictionary_id)
+                        bundle.writestr(f"responses/{key}", self._decompress(data, zdict))
+                        entries.append(
+                            {
+                                "key": key,
+                                "host": host,
+                                "url": url,
+                                "created_at": created_at,
+                                "expires_at": expires_at,
+                            }
+                        )
+            bundle.writestr(
+                "bundle.json", json.dumps({"version": BUNDLE_VERSION, "entries": entries})
+            )
+        logger.info(f"Exported {len(entries)} responses from {self.path} to {path}")
+        return len(entries)
+
+    async def import_bundle(self, path: tp.Union[str, Path]) -> int:
+        """Add the responses in a bundle created by ``export_bundle`` to this cache.
+
+        Responses are de-duplicated by cache key, so responses already in the cache are left
+        untouched. Returns the number of responses added.
+        """
+        imported = 0
+        with zipfile.ZipFile(path) as bundle:
+            manifest = json.loads(bundle.read("bundle.json"))
+            if manifest["version"] != BUNDLE_VERSION:
+                raise ValueError(f"Unsupported cache bundle version {manifest['version']}")
+            now = time.time()
+            for entry in manifest["entries"]:
+                if entry["expires_at"] is not None and entry["expires_at"] <= now:
+                    continue
+                imported += await self._write(
+                    entry["key"],
+                    host=entry["host"],
+                    url=entry["url"],
+                    data=bundle.read(f"responses/{entry['key']}"),
+                    created_at=entry["created_at"],
+                    expires_at=entry["expires_at"],
+                    replace=False,
+                )
+        await self._evict()
+        logger.info(f"Imported {imported} responses from {path} into {self.path}")
+        return imported
+
+    async def aclose(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def _evict(self) -> None:
+        if self.max_bytes is None:
+            return
+        connection = await self._setup()
+        async with self._lock:
+            cursor = await connection.execute("SELECT bytes FROM cache_size WHERE id = 0")
+            (total,) = await cursor.fetchone()
+            if total <= self.max_bytes:
+                return
+            excess = total - int(self.max_bytes * self.evict_to)
+            cursor = await connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed_at"
+            )
+            victims = list()
+            while excess > 0:
+                rows = await cursor.fetchmany(256)
+                if not rows:
+                    break
+                for key, size in rows:
+                    victims.append((key,))
+                    excess -= size
+                    if excess <= 0:
+                        break
+            await connection.executemany("DELETE FROM responses WHERE key = ?", victims)
+            await connection.commit()
+        logger.debug(f"Evicted {len(victims)} responses from {self.path}")
+
+    async def _remove_expired_caches(self) -> None:
+        if time.monotonic() - self._last_cleaned < self._check_ttl_every:
+            return
+        self._last_cleaned = time.monotonic()
+        connection = await self._setup()
+        async with self._lock:
+            await connection.execute(
+                "DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?",
+                (time.time(),),
+            )
+            await connection.commit()
+
+
+def build_cache_storage(ttl: tp.Optional[tp.Union[int, float]] = None) -> hishel.AsyncBaseStorage:
+    """Create the cache storage selected by ``SETTINGS.cache_backend``"""
+    from patent_client import CACHE_DIR
+
+    if SETTINGS.cache_backend == "sqlite":
+        return SQLiteCacheStorage(
+            path=CACHE_DIR / "http_cache.sqlite",
+            max_bytes=SETTINGS.cache_max_bytes,
+            ttl=ttl,
+            compress=SETTINGS.cache_compression,
+        )
+    elif SETTINGS.cache_backend == "file":
+        if SETTINGS.cache_compression:
+            raise ValueError("Cache compression is only supported by the 'sqlite' cache backend")
+        return hishel.AsyncFileStorage(base_path=CACHE_DIR, ttl=ttl)
+    raise ValueError(
+        f"Unknown cache backend {SETTINGS.cache_backend!r}! Must be one of 'sqlite' or 'file'"
+    )
+
+
+# Network time of the requests made on behalf of the cache transport handling the current request
+_network_timings: ContextVar[tp.Optional[tp.List[float]]] = ContextVar(
+    "network_timings", default=None
+)
+
+
+class TimedTransport(httpx.AsyncBaseTransport):
+    """Wraps the network transport to record how long each request that reaches the network takes"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.perf_counter()
+        try:
+            return await self._transport.handle_async_request(request)
+        finally:
+            timings = _network_timings.get()
+            if timings is not None:
+                timings.append(time.perf_counter() - start)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class MeteredStream(httpx.AsyncByteStream):
+    """Counts the bytes of a response body and reports them once the body is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: tp.Callable[[int], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._nbytes = 0
+
+    async def __aiter__(self) -> tp.AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._nbytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+        if self._on_close is not None:
+            self._on_close(self._nbytes)
+            self._on_close = None
+
+
+class MeteredCacheTransport(hishel.AsyncCacheTransport):
+    """
+    hishel cache transport that reports every request to patent_client.metrics.
+
+    Concurrent identical GET and HEAD requests are coalesced: while one request for a cache
+    key is in flight, the others wait for it to finish and are then served from the cache,
+    so only one of them reaches the network. If its response isn't stored, the others go to
+    the network together, and later requests for that key aren't coalesced until a response
+    for it is stored.
+
+    If ``SETTINGS.offline`` is set, or the request has the ``cache_only`` extension, responses
+    are served only from the cache, regardless of their freshness, and a request that isn't
+    in the cache raises ``CacheMissError`` instead of going to the network.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, **kwargs):
+        super().__init__(transport=TimedTransport(transport), **kwargs)
+        self._in_flight: tp.Dict[str, AsyncLock] = dict()
+        # Keys whose last response wasn't stored, most recent last
+        self._uncached: OrderedDict[str, None] = OrderedDict()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method not in ("GET", "HEAD") or request.extensions.get("cache_disabled"):
+            return await self._handle_request(request)
+        cache_request = Request(
+            method=request.method,
+            url=URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            extensions=request.extensions,
+        )
+        key = self._controller._key_generator(cache_request, b"")
+        if key in self._uncached:
+            # Waiting for another request would only queue this one behind it
+            return await self._handle_and_track(key, cache_request, request)
+        flight = AsyncLock()
+        async with flight:
+            current = self._in_flight.setdefault(key, flight)
+            if current is flight:
+                try:
+                    return await self._handle_and_track(key, cache_request, request)
+                finally:
+                    del self._in_flight[key]
+        # An identical request is in flight. Once it is done, its response is in the cache,
+        # unless it couldn't be stored, in which case every waiter goes to the network at once
+        async with current:
+            pass
+        return await self._handle_request(request)
+
+    async def _handle_and_track(
+        self, key: str, cache_request: Request, request: httpx.Request
+    ) -> httpx.Response:
+        """Handle ``request``, and remember whether its response was stored"""
+        response = await self._handle_request(request)
+        stored = response.extensions.get("from_cache", False) or self._controller.is_cachable(
+            request=cache_request,
+            response=Response(status=response.status_code, headers=response.headers.raw),
+        )
+        self._uncached.pop(key, None)
+        if not stored:
+            self._uncached[key] = None
+            while len(self._uncached) > MAX_UNCACHED_KEYS:
+                self._uncached.popitem(last=False)
+        return response
+
+    async def _handle_request(self, request: httpx.Request) -> httpx.Response:
+        cache_only = SETTINGS.offline or request.extensions.get("cache_only", False)
+        if cache_only:
+            request.extensions["force_cache"] = True
+            request.headers["Cache-Control"] = "only-if-cached"
+        timings: tp.List[float] = list()
+        token = _network_timings.set(timings)
+        try:
+            response = await super().handle_async_request(request)
+        finally:
+            _network_timings.reset(token)
+        if cache_only and not response.extensions.get("from_cache", False):
+            await response.aclose()
+            raise CacheMissError(f"{request.method} {request.url} is not in the cache")
+        if not response.extensions.get("from_cache", False):
+            event = "miss"
+        elif timings:
+            event = "revalidated"
+        else:
+            event = "hit"
+        url, elapsed = str(request.url), sum(timings)
+        response.stream = MeteredStream(
+            response.stream, lambda nbytes: metrics.record(event, url, nbytes, elapsed)
+        )
+        return response
+
+
+async def export_cache_bundle(path: tp.Union[str, Path], **filters) -> int:
+    """Export responses from the patent_client cache to a portable bundle.
+    See ``SQLiteCacheStorage.export_bundle`` for the available filters"""
+    storage = build_cache_storage()
+    if not isinstance(storage, SQLiteCacheStorage):
+        raise ValueError("Cache bundles are only supported by the 'sqlite' cache backend")
+    try:
+        return await storage.export_bundle(path, **filters)
+    finally:
+        await storage.aclose()
+
+
+async def import_cache_bundle(path: tp.Union[str, Path]) -> int:
+    """Import a bundle created by ``export_cache_bundle`` into the patent_client cache"""
+    storage = build_cache_storage()
+    if not isinstance(storage, SQLiteCacheStorage):
+        raise ValueError("Cache bundles are only supported by the 'sqlite' cache backend")
+    try:
+        return await storage.import_bundle(path)
+    finally:
+        await storage.aclose()
@@ -7,14 +7,21 @@ from pathlib import Path
 import lxml.etree as ET
 from openpyxl import load_workbook
 
-from patent_client import BASE_DIR
-from patent_client._async.http_client import PatentClientSession
+from patent_client._async.http_client import get_client
 
-session = PatentClientSession()
+session = get_client("www.epo.org")
 
-legal_code_dir = BASE_DIR / "epo"
-legal_code_dir.mkdir(exist_ok=True, parents=True)
-db_location = legal_code_dir / "legal_codes.sqlite"
+
+def legal_code_dir() -> Path:
+    from patent_client import BASE_DIR
+
+    path = BASE_DIR / "epo"
+    path.mkdir(exist_ok=True, parents=True)
+    return path
+
+
+def db_location() -> Path:
+    return legal_code_dir() / "legal_codes.sqlite"
 
 
 logger = logging.getLogger(__name__)
@@ -45,7 +52,7 @@ async def generate_legal_code_db():
 
 
 async def has_current_spreadsheet():
-    con = sqlite3.connect(db_location, timeout=30)
+    con = sqlite3.connect(db_location(), timeout=30)
     cur = con.cursor()
     try:
         fname = cur.execute("SELECT * FROM meta").fetchone()[0]
@@ -78,7 +85,7 @@ async def get_spreadsheet_from_epo_website() -> tuple[datetime.date, str]:
 
 async def get_spreadsheet() -> tuple[datetime.date, Path]:
     date, excel_url = await get_spreadsheet_from_epo_website()
-    out_path = legal_code_dir / f"legal_code_descriptions_{date.strftime('%Y-%W-%w')}.xlsx"
+    out_path = legal_code_dir() / f"legal_code_descriptions_{date.strftime('%Y-%W-%w')}.xlsx"
     if out_path.exists():
         logger.info(f"File already downloaded! Current as of {date.isoformat()}")
         return out_path
@@ -88,7 +95,7 @@ async def get_spreadsheet() -> tuple[datetime.date, Path]:
 
 
 def create_code_database(excel_path):
-    con = sqlite3.connect(db_location, timeout=30)
+    con = sqlite3.connect(db_location(), timeout=30)
     cur = con.cursor()
     try:
         meta = cur.execute("SELECT * FROM meta").fetchone()[0]
@@ -136,7 +143,7 @@ class LegalCodes:
                 "Legal Code Database is out of date - creating legal code database. Note this only happens once!"
             )
             await generate_legal_code_db()
-        self.connection = sqlite3.connect(db_location, timeout=30)
+        self.connection = sqlite3.connect(db_location(), timeout=30)
         self.connection.row_factory = sqlite3.Row
         self.initialized = True
 
@@ -1,5 +1,3 @@
-import math
-
 from patent_client.util.manager import AsyncManager
 
 from .api import PublishedApi
@@ -9,28 +7,9 @@ from .model.fulltext import Claims, Description
 from .model.images import ImageDocument
 
 
-def get_ranges(limit=None, offset=0, page_size=100):
-    offset = offset or 0
-    offset += 1
-    if not limit:
-        page_no = 0
-        while True:
-            start = page_no * page_size + offset
-            yield (start, start + page_size - 1)
-            page_no += 1
-    else:
-        num_full_pages = math.floor(limit / page_size)
-        last_page_size = limit % page_size
-        for i in range(num_full_pages):
-            start = i * page_size + offset
-            yield (start, start + page_size - 1)
-        if last_page_size:
-            start = num_full_pages * page_size + offset
-            yield (start, start + last_page_size - 1)
-
-
 class SearchManager(AsyncManager["BiblioResult"]):
-    result_size = 100
+    page_size = 100
+    random_access = True
     primary_key = "publication"
 
     async def _get_search_results_range(self, start=1, end=100):
@@ -49,13 +28,10 @@ class SearchManager(AsyncManager["BiblioResult"]):
         num_results = min(limit, num_results)
         return num_results
 
-    async def _get_results(self):
-        for start, end in get_ranges(self.config.limit, self.config.offset, self.result_size):
-            page = await self._get_search_results_range(start, end)
-            for result in page.results:
-                yield result
-            if len(page.results) < self.result_size:
-                break
+    async def _get_page(self, start, rows):
+        # OPS ranges are 1-based and inclusive
+        page = await self._get_search_results_range(start + 1, start + rows)
+        return page.results
 
     async def get(self, number, doc_type="publication", format="docdb") -> BiblioResult:
         result = await PublishedApi.biblio.get_biblio(number, doc_type, format)
@@ -0,0 +1,283 @@
+import hashlib
+import json
+
+import httpcore
+import httpx
+import pytest
+
+from patent_client import SETTINGS
+from patent_client.util.concurrency import gather_map
+
+from .download_manifest import DownloadManifest
+from .http_client import PatentClientSession, cache_key_generator, get_client, network_transport
+
+
+class TestClientRegistry:
+    def test_get_client(self):
+        client = get_client("example.com", headers={"X-Test": "1"})
+        assert client.headers["X-Test"] == "1"
+        assert get_client("example.com") is client
+        assert get_client("example.com", headers={"X-Test": "1"}) is client
+        assert get_client("example.org") is not client
+
+    def test_conflicting_arguments(self):
+        get_client("example.net", headers={"X-Test": "1"})
+        with pytest.raises(ValueError):
+            get_client("example.net", headers={"X-Test": "2"})
+
+    def test_shared_pool(self):
+        pool = network_transport.transport._transport._pool
+        assert pool._max_connections == SETTINGS.http_max_connections
+        assert pool._http2 == SETTINGS.http2
+        transport = get_client("example.com")._transport.transport
+        assert transport._transport._transport is network_transport
+
+
+class TestCacheKey:
+    def make_request(self, content=b"", content_type="application/json"):
+        headers = [(b"Content-Type", content_type.encode())] if content_type else []
+        return httpcore.Request(
+            "POST", "https://example.com/search", headers=headers, content=content
+        )
+
+    def test_empty_body(self):
+        request = self.make_request(content_type=None)
+        assert cache_key_generator(request) == cache_key_generator(request, b"")
+        assert cache_key_generator(self.make_request(), b"") == cache_key_generator(request, b"")
+
+    def test_streamed_body(self):
+        request = self.make_request(content=[b"abc", b"def"], content_type="text/plain")
+        assert cache_key_generator(request) == cache_key_generator(request, b"abcdef")
+        assert cache_key_generator(request) != cache_key_generator(request, b"abc")
+
+    def test_canonical_json(self):
+        request = self.make_request()
+        first = cache_key_generator(request, json.dumps({"q": "test", "start": 0}).encode())
+        second = cache_key_generator(request, b'{"start":0,  "q":"test"}')
+        assert first == second
+        assert first != cache_key_generator(request, b'{"start":1,"q":"test"}')
+        # A streamed body gets the same key as the body hishel passes in
+        streamed = self.make_request(content=[b'{"start":0,', b' "q":"test"}'])
+        assert cache_key_generator(streamed) == first
+        # Bodies that aren't valid JSON are hashed as they are
+        assert cache_key_generator(request, b"{") == cache_key_generator(request, b"{")
+
+    def test_volatile_fields(self):
+        def key(url, data):
+            request = httpcore.Request(
+                "POST", url, headers=[(b"Content-Type", b"application/json")]
+            )
+            return cache_key_generator(request, json.dumps(data).encode())
+
+        url = "https://ppubs.uspto.gov/api/searches/counts"
+        query = {"q": "test", "caseId": 1}
+        assert key(url, {"query": query}) == key(url, {"query": {**query, "caseId": 2}})
+        assert key(url, {"query": query}) != key(url, {"query": {**query, "q": "other"}})
+        other_url = "https://example.com/api/searches/counts"
+        assert key(other_url, query) != key(other_url, {**query, "caseId": 2})
+
+        url = "https://ppubs.uspto.gov/api/patents/highlight/1"
+        first = httpcore.Request("GET", url + "?queryId=1&source=USPAT")
+        second = httpcore.Request("GET", url + "?queryId=2&source=USPAT")
+        assert cache_key_generator(first, b"") == cache_key_generator(second, b"")
+
+
+def range_server(content, etag='"v1"'):
+    """A mock server for ``content`` that supports range and conditional requests"""
+    requests = list()
+
+    def handler(request):
+        requests.append(request)
+        headers = {
+            "Accept-Ranges": "bytes",
+            "Content-Disposition": 'attachment; filename="data.bin"',
+            "ETag": etag,
+        }
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers=headers)
+        if "Range" not in request.headers or request.headers.get("If-Range", etag) != etag:
+            return httpx.Response(200, headers=headers, content=content)
+        start, end = request.headers["Range"].removeprefix("bytes=").split("-")
+        end = int(end) if end else len(content) - 1
+        return httpx.Response(206, headers=headers, content=content[int(start) : end + 1])
+
+    return httpx.MockTransport(handler), requests
+
+
+CONTENT = bytes(range(256)) * 64
+
+
+def write_progress(path, **progress):
+    path.with_name(path.name + ".json").write_text(json.dumps(progress))
+
+
+@pytest.fixture
+async def manifest(tmp_path_factory):
+    manifest = DownloadManifest(tmp_path_factory.mktemp("manifest") / "downloads.sqlite")
+    yield manifest
+    await manifest.aclose()
+
+
+@pytest.mark.no_vcr
+class TestDownload:
+    @pytest.mark.asyncio
+    async def test_download(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        path = await session.download("https://example.com/download", path=tmp_path)
+        assert path == tmp_path / "data.bin"
+        assert path.read_bytes() == CONTENT
+        assert not (tmp_path / "data.bin.part").exists()
+
+    @pytest.mark.asyncio
+    async def test_resume(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        part = tmp_path / "data.bin.part"
+        part.write_bytes(CONTENT[:1000])
+        write_progress(part, size=len(CONTENT), validator='"v1"')
+        path = await session.download("https://example.com/download", path=tmp_path)
+        assert path.read_bytes() == CONTENT
+        assert requests[-1].headers["Range"] == "bytes=1000-"
+        assert requests[-1].headers["If-Range"] == '"v1"'
+        assert list(tmp_path.iterdir()) == [path]
+
+    @pytest.mark.asyncio
+    async def test_resume_changed_file(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        part = tmp_path / "data.bin.part"
+        # A partial download of an older version is discarded
+        part.write_bytes(CONTENT[::-1][:1000])
+        write_progress(part, size=len(CONTENT), validator='"v0"')
+        path = await session.download("https://example.com/download", path=tmp_path)
+        assert path.read_bytes() == CONTENT
+        assert len(requests) == 1
+        # As is one without a validator, or with a progress file that can't be read
+        for progress in ("", '{"size": 16384'):
+            part.write_bytes(CONTENT[::-1][:1000])
+            part.with_name(part.name + ".json").write_text(progress)
+            path.unlink()
+            assert (await session.download("https://example.com/download", path=tmp_path)) == path
+            assert path.read_bytes() == CONTENT
+
+    @pytest.mark.asyncio
+    async def test_resume_changed_since_request(self, tmp_path):
+        # The file changes between the first request and the range request, so the server
+        # ignores the range and sends all of the file
+        transport, requests = range_server(CONTENT, etag='"v2"')
+        session = PatentClientSession(transport=transport)
+        part = tmp_path / "data.bin.part"
+        part.write_bytes(CONTENT[:1000])
+        await session._resume_download("https://example.com", part, len(CONTENT), '"v1"')
+        assert requests[-1].headers["If-Range"] == '"v1"'
+        assert part.read_bytes() == CONTENT
+
+    @pytest.mark.asyncio
+    async def test_segments(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        path = await session.download("https://example.com/download", path=tmp_path, segments=4)
+        assert path.read_bytes() == CONTENT
+        assert sorted(r.headers["Range"] for r in requests[1:]) == [
+            "bytes=0-4095",
+            "bytes=12288-16383",
+            "bytes=4096-8191",
+            "bytes=8192-12287",
+        ]
+        assert list(tmp_path.iterdir()) == [path]
+
+    @pytest.mark.asyncio
+    async def test_resume_segments(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        part = tmp_path / "data.bin.part"
+        part.write_bytes(CONTENT[:4096] + b"\0" * (len(CONTENT) - 4096))
+        write_progress(part, size=len(CONTENT), validator='"v1"', segments=4, step=4096, done=[0])
+        path = await session.download("https://example.com/download", path=tmp_path, segments=4)
+        assert path.read_bytes() == CONTENT
+        assert len(requests) == 4
+        assert all(r.headers["If-Range"] == '"v1"' for r in requests[1:])
+
+    @pytest.mark.asyncio
+    async def test_resume_with_other_segments(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        part = tmp_path / "data.bin.part"
+        part.write_bytes(CONTENT[:4096] + b"\0" * (len(CONTENT) - 4096))
+        write_progress(part, size=len(CONTENT), validator='"v1"', segments=4, step=4096, done=[0])
+        # Progress from a download split into other segments is discarded
+        path = await session.download("https://example.com/download", path=tmp_path, segments=2)
+        assert path.read_bytes() == CONTENT
+        assert sorted(r.headers["Range"] for r in requests[1:]) == [
+            "bytes=0-8191",
+            "bytes=8192-16383",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_resume_segments_in_one_piece(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        part = tmp_path / "data.bin.part"
+        part.write_bytes(CONTENT[:4096] + b"\0" * (len(CONTENT) - 4096))
+        write_progress(part, size=len(CONTENT), validator='"v1"', segments=4, step=4096, done=[0])
+        # The preallocated .part file is full size, but isn't complete, so it is downloaded again
+        path = await session.download("https://example.com/download", path=tmp_path)
+        assert path.read_bytes() == CONTENT
+        assert (await manifest.get(path)).sha256 == hashlib.sha256(CONTENT).hexdigest()
+        assert list(tmp_path.iterdir()) == [path]
+
+    @pytest.mark.asyncio
+    async def test_skips_verified_files(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        path = await session.download("https://example.com/download", path=tmp_path)
+        entry = await manifest.get(path)
+        assert entry.size == len(CONTENT)
+        assert entry.etag == '"v1"'
+        assert entry.sha256 == hashlib.sha256(CONTENT).hexdigest()
+        mtime = path.stat().st_mtime
+        assert await session.download("https://example.com/download", path=tmp_path) == path
+        assert requests[-1].headers["If-None-Match"] == '"v1"'
+        assert await session.download("https://example.com/download", path=path) == path
+        assert path.stat().st_mtime == mtime
+        requests.clear()
+        await session.download("https://example.com/download", path=tmp_path, revalidate=False)
+        assert requests == []
+
+    @pytest.mark.asyncio
+    async def test_redownloads_corrupt_files(self, tmp_path, manifest):
+        transport, requests = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        path = await session.download("https://example.com/download", path=tmp_path)
+        path.write_bytes(b"\0" * len(CONTENT))
+        await session.download("https://example.com/download", path=tmp_path)
+        assert "If-None-Match" not in requests[-1].headers
+        assert path.read_bytes() == CONTENT
+
+    @pytest.mark.asyncio
+    async def test_redownloads_changed_files(self, tmp_path, manifest):
+        transport, _ = range_server(CONTENT)
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        path = await session.download("https://example.com/download", path=tmp_path)
+        transport, _ = range_server(CONTENT[::-1], etag='"v2"')
+        session = PatentClientSession(transport=transport, manifest=manifest)
+        assert await session.download("https://example.com/download", path=tmp_path) == path
+        assert path.read_bytes() == CONTENT[::-1]
+        assert (await manifest.get(path)).etag == '"v2"'
+
+
+@pytest.mark.no_vcr
+class TestManifest:
+    @pytest.mark.asyncio
+    async def test_concurrent_records(self, tmp_path, manifest):
+        paths = [tmp_path / f"{i}.bin" for i in range(20)]
+        for path in paths:
+            path.write_bytes(CONTENT)
+
+        async def record(path):
+            await manifest.record(f"https://example.com/{path.name}", path, None, path.name)
+            return await manifest.get(path)
+
+        entries = await gather_map(record, paths)
+        assert [entry.sha256 for entry in entries] == [path.name for path in paths]
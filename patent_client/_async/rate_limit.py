@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import re
+import time
+import typing as tp
+
+import httpx
+from hishel._synchronization import AsyncLock
+
+from patent_client import SETTINGS
+
+logger = logging.getLogger(__name__)
+
+# e.g. "busy (images=green:100, inpadoc=green:45, other=green:1000, retrieval=green:100, search=green:15)"
+OPS_THROTTLING_RE = re.compile(r"(\w+)=(\w+):(\d+)")
+OPS_SERVICES = (
+    ("/published-data/search", "search"),
+    ("/published-data/images", "images"),
+    ("/family", "inpadoc"),
+    ("/legal", "inpadoc"),
+    ("/published-data", "retrieval"),
+)
+# How long to pause a service that OPS reports as "black", i.e. refusing requests
+OPS_BLACK_PAUSE = 60.0
+# How long to pause a host that reports no remaining requests without saying how long to wait
+DEFAULT_PAUSE = 1.0
+
+
+def parse_count(value: tp.Optional[str]) -> tp.Optional[float]:
+    """The non-negative number in a rate limit header, or None if it is missing or malformed"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if number >= 0 and number != float("inf") else None
+
+
+class TokenBucket:
+    """
+    Token bucket that allows ``rate`` requests per second on average, in bursts of up to
+    ``capacity`` requests. If ``rate`` is None, requests are only held back while the
+    bucket is paused.
+    """
+
+    def __init__(self, rate: tp.Optional[float] = None, capacity: tp.Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate or 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = AsyncLock()
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self) -> float:
+        """Take a token if one is available and return 0, or else return how long to wait for one"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.paused_until > now:
+            return self.paused_until - now
+        if self.rate is None:
+            return 0.0
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while (delay := self.delay()) > 0:
+                await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def set_rate(self, rate: float) -> None:
+        self._refill(time.monotonic())
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = min(self.tokens, self.capacity)
+
+    def limit_tokens(self, remaining: float) -> None:
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, remaining)
+
+
+class RateLimiter:
+    """
+    Per-host token buckets, seeded from ``SETTINGS.rate_limits`` and adjusted from the rate
+    limit headers that the servers send back.
+
+    OPS enforces separate quotas for each of its services, so ops.epo.org gets one bucket
+    per service, driven by the ``X-Throttling-Control`` header. PPUBS reports its remaining
+    quota in ``x-rate-limit-remaining`` and how long to back off in
+    ``x-rate-limit-retry-after-seconds``.
+    """
+
+    def __init__(self, rates: tp.Optional[tp.Dict[str, float]] = None):
+        self.rates = rates if rates is not None else SETTINGS.rate_limits
+        self.buckets: tp.Dict[str, TokenBucket] = dict()
+
+    def bucket(self, key: str) -> TokenBucket:
+        if key not in self.buckets:
+            host = key.split("#")[0]
+            self.buckets[key] = TokenBucket(rate=self.rates.get(key, self.rates.get(host)))
+        return self.buckets[key]
+
+    @staticmethod
+    def bucket_key(request: httpx.Request) -> str:
+        host = request.url.host
+        if host == "ops.epo.org":
+            path = request.url.path
+            service = next((s for fragment, s in OPS_SERVICES if fragment in path), "other")
+            return f"{host}#{service}"
+        return host
+
+    async def acquire(self, request: httpx.Request) -> None:
+        await self.bucket(self.bucket_key(request)).acquire()
+
+    def update(self, request: httpx.Request, response: httpx.Response) -> None:
+        """Adjust the buckets from the rate limit headers on a response"""
+        headers = response.headers
+        bucket = self.bucket(self.bucket_key(request))
+        retry_after = parse_count(
+            headers.get("x-rate-limit-retry-after-seconds", headers.get("retry-after"))
+        )
+        if response.status_code == 429:
+            bucket.pause(retry_after if retry_after is not None else DEFAULT_PAUSE)
+        remaining = parse_count(headers.get("x-rate-limit-remaining"))
+        if remaining is not None:
+            bucket.limit_tokens(remaining)
+            if remaining == 0:
+                bucket.pause(retry_after if retry_after is not None else DEFAULT_PAUSE)
+        if "x-throttling-control" in headers:
+            for service, color, per_minute in OPS_THROTTLING_RE.findall(
+                headers["x-throttling-control"]
+            ):
+                service_bucket = self.bucket(f"{request.url.host}#{service}")
+                service_bucket.set_rate(int(per_minute) / 60)
+                if color == "black":
+                    logger.warning(f"OPS service {service} is refusing requests, pausing")
+                    service_bucket.pause(OPS_BLACK_PAUSE)
+
+
+class RateLimitedTransport(httpx.AsyncBaseTransport):
+    """Holds each request until its host's rate limiter allows it, then updates the limiter
+    from the response headers"""
+
+    def __init__(
+        self, transport: httpx.AsyncBaseTransport, limiter: tp.Optional[RateLimiter] = None
+    ):
+        self._transport = transport
+        self.limiter = limiter if limiter is not None else RateLimiter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.limiter.acquire(request)
+        response = await self._transport.handle_async_request(request)
+        self.limiter.update(request, response)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
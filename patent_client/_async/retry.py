@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import random
+import re
+import time
+import typing as tp
+
+import httpx
+from hishel._synchronization import AsyncLock
+
+from patent_client import SETTINGS
+from patent_client.settings import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Errors raised before the request reached the server, so any request can be retried
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+def get_retry_policy(request: httpx.Request) -> RetryPolicy:
+    """Return the first policy in ``SETTINGS.retry_policies`` that matches the request's host"""
+    for policy in SETTINGS.retry_policies:
+        if re.search(policy.host, request.url.host):
+            return policy
+    return RetryPolicy()
+
+
+def backoff_delay(policy: RetryPolicy, attempt: int, response: tp.Optional[httpx.Response] = None):
+    """Full-jitter exponential backoff, but at least as long as the server's Retry-After"""
+    delay = random.uniform(0, min(policy.max_backoff, policy.backoff * 2 ** (attempt - 1)))
+    if response is not None:
+        retry_after = response.headers.get("retry-after", "")
+        if retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), policy.max_backoff))
+    return delay
+
+
+class RetryBudget:
+    """Caps retries so that a struggling host isn't hit with a multiple of its normal load.
+    The budget is shared by concurrent requests, so the balance is only changed under a lock"""
+
+    def __init__(self, ratio: float, per_second: float, burst: float):
+        self.ratio = ratio
+        self.per_second = per_second
+        self.burst = burst
+        self.balance = burst
+        self.updated = time.monotonic()
+        self._lock = AsyncLock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.balance = min(self.burst, self.balance + (now - self.updated) * self.per_second)
+        self.updated = now
+
+    async def deposit(self) -> None:
+        """Called for every request"""
+        async with self._lock:
+            self._refill()
+            self.balance = min(self.burst, self.balance + self.ratio)
+
+    async def withdraw(self) -> bool:
+        """Called before every retry. Returns whether the retry is allowed"""
+        async with self._lock:
+            self._refill()
+            if self.balance < 1:
+                return False
+            self.balance -= 1
+            return True
+
+
+class Retrier:
+    """
+    Retries failed requests according to the host's policy in ``SETTINGS.retry_policies``.
+
+    A request can be marked as safe to retry regardless of its method with the
+    ``idempotent`` extension.
+    """
+
+    def __init__(self):
+        self.budgets: tp.Dict[str, RetryBudget] = dict()
+
+    def budget(self, host: str, policy: RetryPolicy) -> RetryBudget:
+        if host not in self.budgets:
+            # setdefault, so that concurrent callers end up with the same budget
+            self.budgets.setdefault(
+                host,
+                RetryBudget(policy.budget_ratio, policy.budget_per_second, policy.budget_burst),
+            )
+        return self.budgets[host]
+
+    async def send(self, send: tp.Callable, request: httpx.Request, **kwargs) -> httpx.Response:
+        """Send ``request`` with ``send(request, **kwargs)``, retrying it as the policy allows"""
+        policy = get_retry_policy(request)
+        idempotent = request.extensions.get("idempotent", request.method in policy.methods)
+        budget = self.budget(request.url.host, policy)
+        await budget.deposit()
+        attempt = 1
+        while True:
+            response = None
+            try:
+                response = await send(request, **kwargs)
+            except httpx.TransportError as e:
+                retryable = idempotent or isinstance(e, UNSENT_ERRORS)
+                if attempt >= policy.attempts or not retryable or not await budget.withdraw():
+                    raise
+                logger.warning(f"{request.method} {request.url} failed with {e!r}, retrying")
+            else:
+                retryable = response.status_code in policy.statuses and (
+                    idempotent or response.status_code == 429
+                )
+                if attempt >= policy.attempts or not retryable or not await budget.withdraw():
+                    return response
+                logger.warning(
+                    f"{request.method} {request.url} returned {response.status_code}, retrying"
+                )
+                await response.aclose()
+            await asyncio.sleep(backoff_delay(policy, attempt, response))
+            attempt += 1
+
+
+# Shared by every session, so that retry budgets are per host rather than per session
+retrier = Retrier()
@@ -2,12 +2,11 @@ import logging
 import re
 import warnings
 from collections.abc import Sequence
-from typing import AsyncIterator
+from typing import List
 
 from urllib3.connectionpool import InsecureRequestWarning
 
 from patent_client.util.manager import AsyncManager
-from patent_client.util.request_util import get_start_and_row_count
 
 from .api import AssignmentApi
 from .model import Assignment
@@ -36,6 +35,7 @@ class AssignmentManager(AsyncManager["Assignment"]):
         "id": "ReelFrame",
     }
     page_size = 100
+    random_access = True
     obj_class = "patent_client.uspto_assignments.Assignment"
     default_filter = "id"
 
@@ -43,17 +43,9 @@ class AssignmentManager(AsyncManager["Assignment"]):
     def allowed_filters(self):
         return list(self.fields.keys())
 
-    async def _get_results(self) -> AsyncIterator["Assignment"]:
-        for start, rows in get_start_and_row_count(
-            self.config.limit, self.config.offset, self.page_size
-        ):
-            response = await AssignmentApi.lookup(
-                **{**self.get_query(), "start": start, "rows": rows}
-            )
-            for doc in response.docs:
-                yield doc
-            if len(response.docs) < rows:
-                break
+    async def _get_page(self, start, rows) -> List["Assignment"]:
+        response = await AssignmentApi.lookup(**{**self.get_query(), "start": start, "rows": rows})
+        return response.docs
 
     def get_query(self):
         """Get assignments.
@@ -98,7 +90,7 @@ class AssignmentManager(AsyncManager["Assignment"]):
 
     async def count(self) -> int:
         response = await AssignmentApi.lookup(**self.get_query())
-        max_len = response.num_found
+        max_len = response.num_found - self.config.offset
         return min(max_len, self.config.limit) if self.config.limit else max_len
 
     @property
@@ -3,7 +3,7 @@ from urllib.parse import quote
 
 from patent_client import SETTINGS
 
-from ...http_client import PatentClientSession
+from ...http_client import get_client
 from .model import (
     Assignment,
     Continuity,
@@ -27,10 +27,12 @@ def urlescape(s: str) -> str:
 class ODPApi:
     base_url = "https://beta-api.uspto.gov"
 
-    def __init__(self):
+    @property
+    def client(self):
+        # Resolved on first use, so that the module can be imported without an API key
         if SETTINGS.odp_api_key is None:
             raise ValueError("ODP API key is not set")
-        self.client = PatentClientSession(headers={"X-API-KEY": SETTINGS.odp_api_key})
+        return get_client("beta-api.uspto.gov", headers={"X-API-KEY": SETTINGS.odp_api_key})
 
     async def post_search(self, search_request: SearchRequest = SearchRequest()) -> tp.Dict:
         url = self.base_url + "/api/v1/patent/applications/search"
@@ -4,7 +4,7 @@ from typing import Dict, List, Optional
 
 from httpx._exceptions import HTTPStatusError
 
-from patent_client._async.http_client import PatentClientSession
+from patent_client._async.http_client import get_client
 
 from .model import Document, PedsPage
 
@@ -18,7 +18,7 @@ type_map = {
     "text_ws": str,
 }
 
-client = PatentClientSession()
+client = get_client("ped.uspto.gov")
 
 
 class PedsDownException(Exception):
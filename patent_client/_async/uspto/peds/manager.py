@@ -9,7 +9,6 @@ from dateutil.parser import parse as dt_parse
 from pypdf import PdfMerger
 
 from patent_client.util.manager import AsyncManager
-from patent_client.util.request_util import get_start_and_row_count
 
 from .api import PatentExaminationDataSystemApi
 from .query import QueryFields
@@ -48,27 +47,17 @@ def datetime_to_solr(date: datetime.datetime) -> str:
 
 class USApplicationManager(AsyncManager["USApplication"]):
     default_filter = "appl_id"
+    page_size = 20
 
     async def count(self):
         api = PatentExaminationDataSystemApi()
         max_length = (await api.create_query(**self.get_query_params())).num_found
         return min(max_length, self.config.limit) if self.config.limit else max_length
 
-    async def _get_results(self) -> tp.AsyncIterator["USApplication"]:
-        query_params = self.get_query_params()
+    async def _get_page(self, start, rows) -> tp.List["USApplication"]:
         api = PatentExaminationDataSystemApi()
-        counter = 0
-        for start, rows in get_start_and_row_count(
-            self.config.limit, self.config.offset, page_size=20
-        ):
-            page = await api.create_query(**{**query_params, "start": start, "rows": rows})
-            for app in page.applications:
-                yield app
-                counter += 1
-                if self.config.limit and counter >= self.config.limit:
-                    break
-            if len(page.applications) < rows:
-                break
+        page = await api.create_query(**{**self.get_query_params(), "start": start, "rows": rows})
+        return page.applications
 
     def get_query_params(self):
         # Short circuit processing logic if the "query" filter is specified
@@ -4,11 +4,11 @@ from typing import Optional
 
 from dateutil.parser import parse as parse_dt
 
-from patent_client._async.http_client import PatentClientSession
+from patent_client._async.http_client import get_client
 
 from .model import PtabDecisionPage, PtabDocumentPage, PtabProceedingPage
 
-client = PatentClientSession()
+client = get_client("developer.uspto.gov")
 
 
 def convert_date(obj):
@@ -1,10 +1,8 @@
-from copy import deepcopy
 from typing import Callable, Generic, Optional
 
 import inflection
 
 from patent_client.util.manager import AsyncManager, ModelType
-from patent_client.util.request_util import get_start_and_row_count
 
 from .api import PtabApi
 from .model import PtabDecision, PtabDocument, PtabProceeding
@@ -14,29 +12,24 @@ from .util import peds_to_ptab
 class PtabManager(AsyncManager, Generic[ModelType]):
     url = "https://developer.uspto.gov/ptab-api"
     page_size = 25
+    random_access = True
     instance_schema = None
     api_method: Optional[Callable] = None
 
-    async def _get_results(self):
-        query = deepcopy(self.config.filter)
-        query = peds_to_ptab(query)
+    async def _get_page(self, start, rows):
+        query = peds_to_ptab(dict(self.config.filter))
         query["sort"] = " ".join(
             inflection.camelize(o, uppercase_first_letter=False) for o in self.config.order_by
         )
-        for start, rows in get_start_and_row_count(
-            self.config.limit, self.config.offset, self.page_size
-        ):
-            query["start"] = start
-            query["rows"] = rows
-            page = await self.api_method(**query)
-            for doc in page.docs:
-                yield doc
-            if len(page.docs) < rows:
-                break
+        query["start"] = start
+        query["rows"] = rows
+        page = await self.api_method(**query)
+        return page.docs
 
     async def count(self):
-        page = await self.api_method(**peds_to_ptab(self.config.filter))
-        return min(self.config.limit, page.num_found) if self.config.limit else page.num_found
+        page = await self.api_method(**peds_to_ptab(dict(self.config.filter)))
+        max_len = page.num_found - self.config.offset
+        return min(self.config.limit, max_len) if self.config.limit else max_len
 
     # def allowed_filters(self):
     #    params = schema_doc["paths"][self.path]["get"]["parameters"]
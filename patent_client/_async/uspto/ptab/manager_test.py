@@ -1,5 +1,8 @@
+from types import SimpleNamespace
+
 import pytest
 
+from .manager import PtabProceedingManager
 from .model import PtabDecision, PtabDocument, PtabProceeding
 
 
@@ -60,3 +63,24 @@ class TestPtabDecision:
     async def test_get_by_proceeding(self):
         result = await PtabDecision.objects.get(proceeding_number="IPR2016-00831")
         assert result.identifier == "a44c5f1557b7b60d00e66604d3668ce442d53f964aa597011cc476b4"
+
+
+@pytest.mark.no_vcr
+class TestFanOut:
+    @pytest.mark.asyncio
+    async def test_fan_out_with_offset(self, monkeypatch):
+        starts = list()
+
+        async def get_proceedings(start=None, rows=25, **query):
+            # count() doesn't ask for a page
+            if start is not None:
+                starts.append(start)
+            start = start or 0
+            return SimpleNamespace(num_found=60, docs=list(range(start, min(start + rows, 60))))
+
+        monkeypatch.setattr(PtabProceedingManager, "api_method", staticmethod(get_proceedings))
+        manager = PtabProceeding.objects.filter(party_name="Fan Out").offset(40)
+        assert await manager.count() == 20
+        assert [doc async for doc in manager.option(fan_out=4)] == list(range(40, 60))
+        # No pages are requested past the end of the results
+        assert starts == [40]
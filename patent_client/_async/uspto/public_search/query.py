@@ -34,6 +34,10 @@ class QueryBuilder:
         else:
             raise QueryException(f"{date} is not a valid date!")
 
+    def date_range(self, key, start, end):
+        """A clause matching ``key`` dates from ``start`` to ``end``, inclusive"""
+        return f"@{self.search_keywords[key]}>={self.convert_date(start)}<={self.convert_date(end)}"
+
     def is_sequence(self, value):
         return isinstance(value, Sequence) and not isinstance(value, str)
 
@@ -43,7 +47,7 @@ class QueryBuilder:
             value = value[0]
             if isinstance(value, str) and "->" in value:
                 start, end = value.split("->")
-                return f"@{self.search_keywords[key]}>={self.convert_date(start)}<={self.convert_date(end)}"
+                return self.date_range(key, start, end)
             else:
                 return f'@{self.search_keywords[key]}="{self.convert_date(value)}"'
         elif field in self.date_fields and "__" in key:
@@ -55,7 +59,7 @@ class QueryBuilder:
                         f"Input {value} is not a valid date range! Must be a tuple/list of length 2"
                     )
                 # breakpoint()
-                return f"@{self.search_keywords[field]}>={self.convert_date(value[0])}<={self.convert_date(value[1])}"
+                return self.date_range(field, value[0], value[1])
             elif modifier == "lt":
                 return f'@{self.search_keywords[field]}<"{self.convert_date(value)}"'
             elif modifier == "lte":
@@ -0,0 +1,36 @@
+import base64
+import json
+import time
+
+from .session import DEFAULT_SESSION_TTL, PublicSearchSession, SessionStore, token_expiry
+
+
+def make_token(payload: dict) -> str:
+    return base64.b64encode(json.dumps(payload).encode()).decode()
+
+
+class TestSession:
+    def test_token_expiry(self):
+        assert token_expiry(make_token({"sub": "a", "exp": 1700000000})) == 1700000000
+        jwt = "header." + make_token({"exp": 1700000000}).rstrip("=") + ".signature"
+        assert token_expiry(jwt) == 1700000000
+        assert token_expiry(make_token({"sub": "a", "exp": 0})) is None
+        assert token_expiry("not a token") is None
+
+    def test_sessions_without_expiry_use_default_ttl(self):
+        session = PublicSearchSession.create(1, make_token({"exp": 0}), {})
+        assert abs(session.expires_at - (time.time() + DEFAULT_SESSION_TTL)) < 5
+        assert session.is_fresh()
+
+    def test_session_near_expiry_is_not_fresh(self):
+        session = PublicSearchSession.create(1, make_token({"exp": time.time() + 30}), {})
+        assert not session.is_fresh()
+
+    def test_store(self, tmp_path):
+        store = SessionStore(tmp_path / "ppubs_session.json")
+        assert store.load() is None
+        session = PublicSearchSession.create(1, "token", {"JSESSIONID": "abc"})
+        store.save(session)
+        assert SessionStore(tmp_path / "ppubs_session.json").load() == session
+        store.clear()
+        assert store.load() is None
@@ -10,3 +10,15 @@ def html_to_text(html):
     html = newline_re.sub("\n\n", html)
     # html = bad_break_re.sub(" ", html)
     return "".join(ETH.fromstring(html).itertext())
+
+
+number_re = re.compile(r"[^0-9A-Z]")
+kind_code_re = re.compile(r"(?<=\d)[A-Z]\d?$")
+
+
+def number_key(number) -> str:
+    """Reduce a patent or publication number to the form used to match search results to the
+    numbers that were looked up, e.g. "US 6,095,661 A" -> "6095661" """
+    number = number_re.sub("", str(number).upper())
+    number = kind_code_re.sub("", number.removeprefix("US"))
+    return number
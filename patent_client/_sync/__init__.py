@@ -4,20 +4,44 @@
 # *                Source File: patent_client/_async/__init__.py                 *
 # ********************************************************************************
 
-from . import odp
-from .epo.ops.published.model import Inpadoc
-from .uspto.assignment.model import Assignment
-from .uspto.global_dossier.model import GlobalDossier, GlobalDossierApplication
-from .uspto.peds.model import USApplication
-from .uspto.ptab.model import PtabDecision, PtabDocument, PtabProceeding
-from .uspto.public_search.model import (
-    Patent,
-    PatentBiblio,
-    PublicSearchBiblio,
-    PublicSearchDocument,
-    PublishedApplication,
-    PublishedApplicationBiblio,
-)
+import importlib
+import typing as tp
+
+if tp.TYPE_CHECKING:
+    from . import odp
+    from .epo.ops.published.model import Inpadoc
+    from .uspto.assignment.model import Assignment
+    from .uspto.global_dossier.model import GlobalDossier, GlobalDossierApplication
+    from .uspto.peds.model import USApplication
+    from .uspto.ptab.model import PtabDecision, PtabDocument, PtabProceeding
+    from .uspto.public_search.model import (
+        Patent,
+        PatentBiblio,
+        PublicSearchBiblio,
+        PublicSearchDocument,
+        PublishedApplication,
+        PublishedApplicationBiblio,
+    )
+
+# The public names are imported from their modules on first access, so that using one API
+# doesn't pay for importing all of the others
+_lazy_imports = {
+    "Inpadoc": ".epo.ops.published.model",
+    "Assignment": ".uspto.assignment.model",
+    "USApplication": ".uspto.peds.model",
+    "PtabDecision": ".uspto.ptab.model",
+    "PtabDocument": ".uspto.ptab.model",
+    "PtabProceeding": ".uspto.ptab.model",
+    "GlobalDossier": ".uspto.global_dossier.model",
+    "GlobalDossierApplication": ".uspto.global_dossier.model",
+    "PublicSearchBiblio": ".uspto.public_search.model",
+    "PublicSearchDocument": ".uspto.public_search.model",
+    "Patent": ".uspto.public_search.model",
+    "PatentBiblio": ".uspto.public_search.model",
+    "PublishedApplication": ".uspto.public_search.model",
+    "PublishedApplicationBiblio": ".uspto.public_search.model",
+    "odp": ".odp",
+}
 
 __all__ = [
     "Inpadoc",
@@ -36,3 +60,16 @@ __all__ = [
     "PublishedApplicationBiblio",
     "odp",
 ]
+
+
+def __getattr__(name: str) -> tp.Any:
+    if name not in _lazy_imports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_lazy_imports[name], __name__)
+    value = module if module.__name__ == f"{__name__}.{name}" else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> tp.List[str]:
+    return sorted(set(globals()) | set(__all__))
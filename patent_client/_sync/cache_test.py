@@ -0,0 +1,330 @@
+# ********************************************************************************
+# *         WARNING: This file is automatically generated by unasync.py.         *
+# *                             DO NOT MANUALLY EDIT                             *
+# *               Source File: patent_client/_async/cache_test.py                *
+# ********************************************************************************
+
+import datetime
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+from httpcore import Request, Response
+
+from patent_client import SETTINGS, metrics
+from patent_client.settings import CachePolicy
+from patent_client.util.concurrency import thread_map
+
+from .cache import (
+    CacheMissError,
+    MeteredCacheTransport,
+    PolicyController,
+    SQLiteCacheStorage,
+    get_cache_policy,
+)
+from .http_client import PatentClientSession
+
+
+def make_pair(url="https://example.com/data", content=b"x" * 1000, method="GET", headers=()):
+    request = Request(method, url)
+    response = Response(200, headers=[(b"Content-Type", b"text/plain"), *headers], content=content)
+    response.read()
+    return request, response
+
+
+class TestSQLiteCacheStorage:
+    def test_store_and_retrieve(self, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite")
+        request, response = make_pair()
+        storage.store("key", response=response, request=request)
+        stored_response, stored_request, metadata = storage.retrieve("key")
+        stored_response.read()
+        assert stored_response.status == 200
+        assert stored_response.content == b"x" * 1000
+        assert metadata["cache_key"] == "key"
+        assert storage.retrieve("missing") is None
+        storage.close()
+
+    def test_overwrite_tracks_size(self, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite")
+        request, response = make_pair(content=b"x" * 1000)
+        storage.store("key", response=response, request=request)
+        first_size = storage.size()
+        request, response = make_pair(content=b"x" * 10)
+        storage.store("key", response=response, request=request)
+        assert storage.size() < first_size
+        storage.close()
+
+    def test_lru_eviction(self, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite")
+        for i in range(3):
+            request, response = make_pair(url=f"https://example.com/{i}")
+            storage.store(f"key-{i}", response=response, request=request)
+        entry_size = storage.size() / 3
+        storage.max_bytes = int(entry_size * 3.5)
+        # Touch the oldest entry so it becomes the most recently used
+        request, response = make_pair(url="https://example.com/0")
+        storage.update_metadata("key-0", response, request, metadata={})
+        request, response = make_pair(url="https://example.com/3")
+        storage.store("key-3", response=response, request=request)
+        assert storage.size() <= storage.max_bytes
+        assert storage.retrieve("key-0") is not None
+        assert storage.retrieve("key-1") is None
+        assert storage.retrieve("key-2") is not None
+        assert storage.retrieve("key-3") is not None
+        storage.close()
+
+    def test_ttl(self, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite", ttl=-1)
+        request, response = make_pair()
+        storage.store("key", response=response, request=request)
+        assert storage.retrieve("key") is None
+        assert storage.size() == 0
+        storage.close()
+
+    def test_compression(self, tmp_path):
+        content = b'{"patentNumber": "6103599", "title": "Planarizing technique"}' * 50
+        plain = SQLiteCacheStorage(tmp_path / "plain.sqlite")
+        compressed = SQLiteCacheStorage(tmp_path / "compressed.sqlite", compress=True)
+        for storage in (plain, compressed):
+            for i in range(2):
+                request, response = make_pair(url=f"https://example.com/{i}", content=content)
+                storage.store(f"key-{i}", response=response, request=request)
+        assert compressed.size() * 5 < plain.size()
+        stored_response, _, _ = compressed.retrieve("key-1")
+        stored_response.read()
+        assert stored_response.content == content
+        plain.close()
+        compressed.close()
+
+    def test_compression_reads_uncompressed_rows(self, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite")
+        request, response = make_pair()
+        storage.store("key", response=response, request=request)
+        storage.close()
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite", compress=True)
+        stored_response, _, _ = storage.retrieve("key")
+        stored_response.read()
+        assert stored_response.content == b"x" * 1000
+        storage.close()
+
+
+class TestCacheBundles:
+    @pytest.fixture
+    def source(self, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "source.sqlite", compress=True)
+        for url in (
+            "https://ppubs.uspto.gov/api/patents/highlight/US-6103599-A",
+            "https://ppubs.uspto.gov/api/patents/highlight/US-61035990-A",
+            "https://ops.epo.org/3.2/rest-services/published-data/publication/docdb/EP.1000000.A1/biblio",
+        ):
+            request, response = make_pair(url=url)
+            storage.store(url, response=response, request=request)
+        yield storage
+        storage.close()
+
+    def test_export_and_import(self, source, tmp_path):
+        assert source.export_bundle(tmp_path / "bundle.zip") == 3
+        target = SQLiteCacheStorage(tmp_path / "target.sqlite")
+        assert target.import_bundle(tmp_path / "bundle.zip") == 3
+        url = "https://ops.epo.org/3.2/rest-services/published-data/publication/docdb/EP.1000000.A1/biblio"
+        stored_response, _, _ = target.retrieve(url)
+        stored_response.read()
+        assert stored_response.content == b"x" * 1000
+        # Importing the same bundle again adds nothing
+        assert target.import_bundle(tmp_path / "bundle.zip") == 0
+        target.close()
+
+    def test_export_filters(self, source, tmp_path):
+        bundle = tmp_path / "bundle.zip"
+        assert source.export_bundle(bundle, hosts=["ops.epo.org"]) == 1
+        assert source.export_bundle(bundle, documents=["US6103599"]) == 1
+        assert source.export_bundle(bundle, documents=["US 6,103,599", "EP1000000"]) == 2
+        today = datetime.date.today()
+        assert source.export_bundle(bundle, since=today, until=today) == 3
+        assert source.export_bundle(bundle, until=today - datetime.timedelta(days=1)) == 0
+
+
+class TestCachePolicies:
+    @pytest.fixture
+    def policies(self, monkeypatch):
+        policies = [
+            CachePolicy(pattern=r"^https://example\.com/immutable", mode="immutable"),
+            CachePolicy(pattern=r"^https://example\.com/hourly", ttl=3600),
+            CachePolicy(pattern=r"^https://example\.com/search", ttl=3600, methods=["POST"]),
+            CachePolicy(pattern=r"^https://example\.com/live", mode="no-store"),
+        ]
+        monkeypatch.setattr(SETTINGS, "cache_policies", policies)
+        return policies
+
+    def test_default_policies(self):
+        request = Request(
+            "GET", "http://ops.epo.org/3.2/rest-services/number-service/publication/docdb/X"
+        )
+        assert get_cache_policy(request).mode == "immutable"
+        request = Request("GET", "https://ops.epo.org/3.2/rest-services/family/publication/X")
+        assert get_cache_policy(request).ttl == 60 * 60 * 24 * 3
+        assert get_cache_policy(Request("GET", "https://example.com")) is None
+
+    def test_policy_matching(self, policies):
+        assert get_cache_policy(Request("GET", "https://example.com/immutable/1")) == policies[0]
+        assert get_cache_policy(Request("POST", "https://example.com/search")) == policies[2]
+        assert get_cache_policy(Request("GET", "https://example.com/search")) is None
+
+    def test_controller(self, policies):
+        controller = PolicyController()
+        request, response = make_pair(url="https://example.com/search", method="POST")
+        assert controller.is_cachable(request, response)
+        assert controller.construct_response_from_cache(request, response, request) is response
+        request, response = make_pair(url="https://example.com/live")
+        assert not controller.is_cachable(request, response)
+        request, response = make_pair(
+            url="https://example.com/hourly",
+            headers=[(b"Date", b"Mon, 01 Jan 2024 00:00:00 GMT")],
+        )
+        assert controller.construct_response_from_cache(request, response, request) is None
+
+    def test_storage_uses_policy_ttl(self, policies, tmp_path):
+        storage = SQLiteCacheStorage(tmp_path / "cache.sqlite", ttl=-1)
+        request, response = make_pair(url="https://example.com/immutable/1")
+        storage.store("immutable", response=response, request=request)
+        request, response = make_pair(url="https://example.com/other")
+        storage.store("other", response=response, request=request)
+        assert storage.retrieve("immutable") is not None
+        assert storage.retrieve("other") is None
+        storage.close()
+
+
+class TestMeteredCacheTransport:
+    def test_records_hits_and_misses(self, tmp_path):
+        metrics.reset()
+        network = httpx.MockTransport(
+            lambda request: httpx.Response(
+                200,
+                headers={"Cache-Control": "max-age=3600", "Date": formatdate(usegmt=True)},
+                content=b"x" * 100,
+            )
+        )
+        transport = MeteredCacheTransport(
+            transport=network,
+            storage=SQLiteCacheStorage(tmp_path / "cache.sqlite"),
+        )
+        for _ in range(3):
+            request = httpx.Request("GET", "https://example.com/documents/123")
+            response = transport.handle_request(request)
+            assert response.read() == b"x" * 100
+            response.close()
+        transport.close()
+        endpoint = metrics.snapshot()["example.com"]["/documents/{id}"]
+        assert endpoint["misses"] == 1
+        assert endpoint["hits"] == 2
+        assert endpoint["bytes_from_network"] == 100
+        assert endpoint["bytes_from_cache"] == 200
+        metrics.reset()
+
+    def test_coalesces_identical_requests(self, tmp_path):
+        calls = list()
+
+        def handler(request):
+            calls.append(request)
+            time.sleep(0.2)
+            return httpx.Response(
+                200,
+                headers={"Cache-Control": "max-age=3600", "Date": formatdate(usegmt=True)},
+                content=b"x" * 100,
+            )
+
+        transport = MeteredCacheTransport(
+            transport=httpx.MockTransport(handler),
+            storage=SQLiteCacheStorage(tmp_path / "cache.sqlite"),
+        )
+
+        def fetch(url):
+            response = transport.handle_request(httpx.Request("GET", url))
+            content = response.read()
+            response.close()
+            return content
+
+        urls = ["https://example.com/1"] * 5 + ["https://example.com/2"]
+        results = thread_map(fetch, urls, concurrency=len(urls))
+        assert results == [b"x" * 100] * 6
+        assert sorted(str(call.url) for call in calls) == [
+            "https://example.com/1",
+            "https://example.com/2",
+        ]
+        transport.close()
+
+    def test_uncached_requests_are_not_queued(self, tmp_path):
+        calls = list()
+        running = [0]
+
+        def handler(request):
+            calls.append(running[0])
+            running[0] += 1
+            time.sleep(0.1)
+            running[0] -= 1
+            return httpx.Response(200, headers={"Cache-Control": "no-store"}, content=b"x")
+
+        transport = MeteredCacheTransport(
+            transport=httpx.MockTransport(handler),
+            storage=SQLiteCacheStorage(tmp_path / "cache.sqlite"),
+        )
+
+        def fetch(url):
+            response = transport.handle_request(httpx.Request("GET", url))
+            response.read()
+            response.close()
+
+        # The first request isn't stored, so the ones waiting for it all go to the network
+        thread_map(fetch, ["https://example.com/1"] * 5)
+        assert sorted(calls) == [0, 0, 1, 2, 3]
+        # After that, requests for the same URL aren't coalesced at all
+        calls.clear()
+        thread_map(fetch, ["https://example.com/1"] * 5)
+        assert sorted(calls) == [0, 1, 2, 3, 4]
+        transport.close()
+
+    def test_offline(self, tmp_path, monkeypatch):
+        calls = list()
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(
+                200,
+                headers={"Cache-Control": "max-age=0", "Date": formatdate(usegmt=True)},
+                content=b"x" * 100,
+            )
+
+        transport = MeteredCacheTransport(
+            transport=httpx.MockTransport(handler),
+            storage=SQLiteCacheStorage(tmp_path / "cache.sqlite"),
+        )
+        response = transport.handle_request(httpx.Request("GET", "https://example.com/1"))
+        response.read()
+        response.close()
+        assert len(calls) == 1
+
+        # Stale responses are served without revalidation
+        request = httpx.Request("GET", "https://example.com/1", extensions={"cache_only": True})
+        response = transport.handle_request(request)
+        assert response.read() == b"x" * 100
+        response.close()
+        with pytest.raises(CacheMissError):
+            request = httpx.Request("GET", "https://example.com/2", extensions={"cache_only": True})
+            transport.handle_request(request)
+
+        monkeypatch.setattr(SETTINGS, "offline", True)
+        with pytest.raises(CacheMissError):
+            transport.handle_request(httpx.Request("GET", "https://example.com/2"))
+        assert len(calls) == 1
+        transport.close()
+
+    def test_session_offline(self):
+        session = PatentClientSession()
+        assert "cache_only" not in session.build_request("GET", "https://example.com").extensions
+        with session.offline():
+            with session.offline():
+                pass
+            assert session.build_request("GET", "https://example.com").extensions["cache_only"]
+        assert "cache_only" not in session.build_request("GET", "https://example.com").extensions
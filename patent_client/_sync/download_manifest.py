@@ -0,0 +1,147 @@
+# ********************************************************************************
+# *         WARNING: This file is automatically generated by unasync.py.         *
+# *                             DO NOT MANUALLY EDIT                             *
+# *            Source File: patent_client/_async/download_manifest.py            *
+# ********************************************************************************
+
+import hashlib
+import sqlite3
+import time
+import typing as tp
+from dataclasses import dataclass
+from pathlib import Path
+
+from hishel._synchronization import Lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    path TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    etag TEXT,
+    sha256 TEXT NOT NULL,
+    downloaded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS downloads_url ON downloads (url);
+"""
+
+
+def hash_file(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class ManifestEntry:
+    path: Path
+    url: str
+    size: int
+    mtime: float
+    etag: tp.Optional[str]
+    sha256: str
+
+    def is_intact(self, verify: bool = False) -> bool:
+        """Whether the file on disk is still the file that was downloaded.
+
+        A file with the recorded size and modification time is trusted without reading it,
+        unless ``verify`` is set. Otherwise it is hashed and compared with the recorded hash.
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        if stat.st_size != self.size:
+            return False
+        if stat.st_mtime == self.mtime and not verify:
+            return True
+        return hash_file(self.path) == self.sha256
+
+
+class DownloadManifest:
+    """
+    Records the size, ETag and SHA-256 hash of every file written by
+    ``PatentClientSession.download``, so that a later download of the same file can be
+    skipped if the file on disk is intact and unchanged on the server.
+
+    Args:
+        path: The SQLite database to keep the manifest in. Defaults to ``downloads.sqlite``
+            in the base directory
+    """
+
+    def __init__(self, path: tp.Optional[tp.Union[str, Path]] = None):
+        self.path = Path(path) if path is not None else None
+        self._connection = None
+        self._setup_lock = Lock()
+        # The connection is shared by every coroutine, and in the sync tree by every thread,
+        # so statements and their commits are run one at a time
+        self._lock = Lock()
+
+    def _setup(self):
+        with self._setup_lock:
+            if self._connection is None:
+                if self.path is None:
+                    from patent_client import BASE_DIR
+
+                    self.path = BASE_DIR / "downloads.sqlite"
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                connection = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+                connection.execute("PRAGMA journal_mode=WAL")
+                connection.executescript(SCHEMA)
+                connection.commit()
+                self._connection = connection
+        return self._connection
+
+    def _select(self, where: str, *params) -> tp.List[ManifestEntry]:
+        connection = self._setup()
+        with self._lock:
+            cursor = connection.execute(
+                f"SELECT path, url, size, mtime, etag, sha256 FROM downloads WHERE {where}", params
+            )
+            rows = cursor.fetchall()
+        return [ManifestEntry(Path(row[0]), *row[1:]) for row in rows]
+
+    def get(self, path: Path) -> tp.Optional[ManifestEntry]:
+        """Return the entry for the file at ``path``, if there is one"""
+        entries = self._select("path = ?", str(path.resolve()))
+        return entries[0] if entries else None
+
+    def find(self, url: str, directory: Path) -> tp.Optional[ManifestEntry]:
+        """Return the entry for ``url`` downloaded into ``directory``, if there is one"""
+        directory = directory.resolve()
+        for entry in self._select("url = ?", str(url)):
+            if entry.path.parent == directory:
+                return entry
+        return None
+
+    def record(self, url: str, path: Path, etag: tp.Optional[str], sha256: str) -> None:
+        stat = path.stat()
+        row = (
+            str(path.resolve()),
+            str(url),
+            stat.st_size,
+            stat.st_mtime,
+            etag,
+            sha256,
+            time.time(),
+        )
+        connection = self._setup()
+        with self._lock:
+            connection.execute(
+                "INSERT OR REPLACE INTO downloads (path, url, size, mtime, etag, sha256, downloaded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            connection.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+download_manifest = DownloadManifest()
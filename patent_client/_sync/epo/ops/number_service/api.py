@@ -35,8 +35,7 @@ class NumberServiceApi:
         output_format: output type (original / docdb / epodoc)
         """
         response = session.get(
-            f"http://ops.epo.org/3.2/rest-services/number-service/{doc_type}/{input_format}/{number}/{output_format}",
-            extensions={"force_cache": True},
+            f"http://ops.epo.org/3.2/rest-services/number-service/{doc_type}/{input_format}/{number}/{output_format}"
         )
         result = NumberServiceResult.model_validate(response.text)
         errors = [m for m in result.messages if m["kind"] == "ERROR"]
@@ -4,8 +4,6 @@
 # *        Source File: patent_client/_async/epo/ops/published/manager.py        *
 # ********************************************************************************
 
-import math
-
 from patent_client.util.manager import Manager
 
 from .api import PublishedApi
@@ -15,28 +13,9 @@ from .model.fulltext import Claims, Description
 from .model.images import ImageDocument
 
 
-def get_ranges(limit=None, offset=0, page_size=100):
-    offset = offset or 0
-    offset += 1
-    if not limit:
-        page_no = 0
-        while True:
-            start = page_no * page_size + offset
-            yield (start, start + page_size - 1)
-            page_no += 1
-    else:
-        num_full_pages = math.floor(limit / page_size)
-        last_page_size = limit % page_size
-        for i in range(num_full_pages):
-            start = i * page_size + offset
-            yield (start, start + page_size - 1)
-        if last_page_size:
-            start = num_full_pages * page_size + offset
-            yield (start, start + last_page_size - 1)
-
-
 class SearchManager(Manager["BiblioResult"]):
-    result_size = 100
+    page_size = 100
+    random_access = True
     primary_key = "publication"
 
     def _get_search_results_range(self, start=1, end=100):
@@ -55,13 +34,10 @@ class SearchManager(Manager["BiblioResult"]):
         num_results = min(limit, num_results)
         return num_results
 
-    def _get_results(self):
-        for start, end in get_ranges(self.config.limit, self.config.offset, self.result_size):
-            page = self._get_search_results_range(start, end)
-            for result in page.results:
-                yield result
-            if len(page.results) < self.result_size:
-                break
+    def _get_page(self, start, rows):
+        # OPS ranges are 1-based and inclusive
+        page = self._get_search_results_range(start + 1, start + rows)
+        return page.results
 
     def get(self, number, doc_type="publication", format="docdb") -> BiblioResult:
         result = PublishedApi.biblio.get_biblio(number, doc_type, format)
@@ -9,15 +9,23 @@ import datetime as dt
 import logging
 from typing import Sequence
 
-import hishel
 import httpx
-from httpcore import Request, Response
 
 from patent_client import SETTINGS
-from patent_client._sync.http_client import PatentClientSession
-from patent_client.session import CACHE_DIR
+from patent_client._sync.cache import MeteredCacheTransport, PolicyController, build_cache_storage
+from patent_client._sync.http_client import (
+    LazyTransport,
+    cache_key_generator,
+    get_client,
+    network_transport,
+)
+from patent_client.settings import CachePolicy
 
 logger = logging.getLogger(__name__)
+
+# Used for OPS endpoints not covered by SETTINGS.cache_policies
+OPS_CACHE_TTL = 60 * 60 * 24 * 3
+
 NS = {
     "http://ops.epo.org": None,
     "http://www.epo.org/exchange": None,
@@ -38,25 +46,20 @@ class OpsFairUseError(Exception):
     pass
 
 
-class OpsController(hishel.Controller):
+class OpsController(PolicyController):
     def __init__(
         self,
         cacheable_methods: Sequence[str] = ("GET", "HEAD"),
         cacheable_status_codes: Sequence[int] = (200,),
     ):
-        super().__init__()
-        self.cacheable_methods = cacheable_methods
-        self.cacheable_status_codes = cacheable_status_codes
-
-    def is_cachable(self, request: Request, response: Response) -> bool:
-        return (
-            request.method in self.cacheable_methods
-            and response.status_code in self.cacheable_status_codes
+        super().__init__(
+            default_policy=CachePolicy(
+                pattern=".*", ttl=OPS_CACHE_TTL, methods=list(cacheable_methods)
+            ),
+            cacheable_status_codes=list(cacheable_status_codes),
+            key_generator=cache_key_generator,
         )
 
-    def construct_response_from_cache(self, request, response, original_request):
-        return response
-
 
 class OpsAuth(httpx.Auth):
     requires_response_body = True
@@ -95,14 +98,12 @@ class OpsAuth(httpx.Auth):
         )
 
 
-ops_transport = hishel.CacheTransport(
-    transport=httpx.HTTPTransport(
-        verify=False,
-        http2=True,
-        retries=3,
-    ),
-    storage=hishel.FileStorage(base_path=CACHE_DIR, ttl=60 * 60 * 24 * 3),
-    controller=OpsController(),
+ops_transport = LazyTransport(
+    lambda: MeteredCacheTransport(
+        transport=network_transport,
+        storage=build_cache_storage(ttl=OPS_CACHE_TTL),
+        controller=OpsController(),
+    )
 )
 
 
@@ -112,7 +113,8 @@ def handle_response(response):
     return response
 
 
-session = PatentClientSession(
+session = get_client(
+    "ops.epo.org",
     transport=ops_transport,
     auth=OpsAuth(key=SETTINGS.epo_api_key, secret=SETTINGS.epo_api_secret),
     event_hooks={
@@ -4,45 +4,178 @@
 # *               Source File: patent_client/_async/http_client.py               *
 # ********************************************************************************
 
+import hashlib
+import json
+import logging
+import os
 import re
+import tempfile
 import typing as tp
 import warnings
+from contextlib import contextmanager
 from hashlib import blake2b
 from pathlib import Path
 
-import hishel
 import httpcore
 import httpx
-from hishel._utils import normalized_url
+from hishel._synchronization import Lock
+from hishel._utils import extract_header_values_decoded, normalized_url
 
-from patent_client import CACHE_DIR
+from patent_client import SETTINGS
+from patent_client.util.concurrency import run_inline, thread_map
 from patent_client.version import __version__
 
+from .cache import MeteredCacheTransport, PolicyController, build_cache_storage
+from .download_manifest import download_manifest, hash_file
+from .rate_limit import RateLimitedTransport
+from .retry import retrier
+
+logger = logging.getLogger(__name__)
+
 filename_re = re.compile(r'filename="([^"]+)"')
 
 
-def cache_key_generator(request: httpcore.Request):
-    encoded_url = normalized_url(request.url).encode("ascii")
-    body = [c for c in request.stream]
-    if isinstance(body[0], bytes):
-        body = b"".join(body)
-    else:
-        body = "".join(body).encode("utf-8")
+class DownloadError(Exception):
+    pass
+
+
+def canonical_json(data: tp.Any) -> bytes:
+    """Serialize ``data`` so that equal JSON values always produce the same bytes"""
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode(
+        "utf-8"
+    )
+
+
+def volatile_fields(url: str) -> tp.Set[str]:
+    """Fields that are left out of the cache key for ``url``, see ``SETTINGS.cache_volatile_fields``"""
+    fields: tp.Set[str] = set()
+    for pattern, names in SETTINGS.cache_volatile_fields.items():
+        if re.search(pattern, url):
+            fields.update(names)
+    return fields
+
+
+def strip_fields(data: tp.Any, fields: tp.Set[str]) -> tp.Any:
+    """Remove ``fields`` from every object in a JSON value"""
+    if isinstance(data, dict):
+        return {k: strip_fields(v, fields) for k, v in data.items() if k not in fields}
+    if isinstance(data, list):
+        return [strip_fields(v, fields) for v in data]
+    return data
+
+
+def iter_body(request: httpcore.Request, body: tp.Optional[bytes] = None) -> tp.Iterator[bytes]:
+    if body is not None:
+        yield body
+        return
+    for chunk in request.stream:
+        yield chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+def cache_key_generator(request: httpcore.Request, body: tp.Optional[bytes] = None):
+    """Cache key for ``request``, from its method, normalized URL and body.
+
+    hishel reads the body and passes it in as ``body``. Without it, the body is fed to the hash
+    chunk by chunk from the request stream. JSON bodies are hashed in canonical form, so that
+    requests that only differ in key order or whitespace share a cache entry. Session specific
+    fields listed in ``SETTINGS.cache_volatile_fields`` are dropped from JSON bodies and query
+    strings.
+    """
+    url = normalized_url(request.url)
+    fields = volatile_fields(url)
+    if fields and "?" in url:
+        parsed = httpx.URL(url)
+        if any(field in parsed.params for field in fields):
+            for field in fields:
+                parsed = parsed.copy_remove_param(field)
+            url = str(parsed)
     key = blake2b(digest_size=16)
-    key.update(encoded_url)
+    key.update(url.encode("ascii"))
     key.update(request.method)
-    key.update(body)
+    content_type = extract_header_values_decoded(request.headers, b"Content-Type")
+    if content_type and content_type[0].startswith("application/json"):
+        # Parsing needs the whole body, which hishel has already read
+        content = body if body is not None else b"".join(iter_body(request))
+        try:
+            key.update(
+                canonical_json(strip_fields(json.loads(content), fields)) if content else content
+            )
+        except ValueError:
+            key.update(content)
+    else:
+        for chunk in iter_body(request, body):
+            key.update(chunk)
     return key.hexdigest()
 
 
-patent_client_transport = hishel.CacheTransport(
-    transport=httpx.HTTPTransport(
-        verify=False,
-        http2=True,
-        retries=3,
-    ),
-    storage=hishel.FileStorage(base_path=CACHE_DIR),
-    controller=hishel.Controller(allow_heuristics=True),
+def range_validator(headers: httpx.Headers) -> tp.Optional[str]:
+    """The validator to send in ``If-Range``: a strong ETag, or else the Last-Modified date"""
+    etag = headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("Last-Modified")
+
+
+def read_progress(path: Path) -> tp.Optional[dict]:
+    """The progress recorded for a partial download, or None if there is none or it can't be read"""
+    try:
+        progress = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return progress if isinstance(progress, dict) else None
+
+
+def write_progress(path: Path, progress: dict) -> None:
+    # Written to a temporary file and moved into place, so readers never see half a file
+    fd, temp = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+    with os.fdopen(fd, "w") as f:
+        json.dump(progress, f)
+    os.replace(temp, path)
+
+
+class LazyTransport(httpx.BaseTransport):
+    """Builds the transport returned by ``factory`` when it is first used, so that creating
+    sessions at import time doesn't open the cache or set up connection pools"""
+
+    def __init__(self, factory: tp.Callable[[], httpx.BaseTransport]):
+        self._factory = factory
+        self._transport: tp.Optional[httpx.BaseTransport] = None
+
+    @property
+    def transport(self) -> httpx.BaseTransport:
+        if self._transport is None:
+            self._transport = self._factory()
+        return self._transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+
+
+# A single connection pool and rate limiter shared by every session
+network_transport = LazyTransport(
+    lambda: RateLimitedTransport(
+        httpx.HTTPTransport(
+            verify=False,
+            http2=SETTINGS.http2,
+            limits=httpx.Limits(
+                max_connections=SETTINGS.http_max_connections,
+                max_keepalive_connections=SETTINGS.http_max_keepalive_connections,
+                keepalive_expiry=SETTINGS.http_keepalive_expiry,
+            ),
+        )
+    )
+)
+
+patent_client_transport = LazyTransport(
+    lambda: MeteredCacheTransport(
+        transport=network_transport,
+        storage=build_cache_storage(),
+        controller=PolicyController(allow_heuristics=True, key_generator=cache_key_generator),
+    )
 )
 
 
@@ -50,13 +183,33 @@ class PatentClientSession(httpx.Client):
     _default_user_agent = f"Mozilla/5.0 Python Patent Clientbot/{__version__} (parkerhancock@users.noreply.github.com)"
 
     def __init__(self, **kwargs):
+        self.manifest = kwargs.pop("manifest", download_manifest)
         kwargs["transport"] = kwargs.get("transport", patent_client_transport)
-        headers = kwargs.get("headers", dict())
-        headers["User-Agent"] = headers.get("User-Agent", self._default_user_agent)
+        headers = httpx.Headers(kwargs.get("headers"))
+        headers.setdefault("User-Agent", self._default_user_agent)
         kwargs["headers"] = headers
         kwargs["follow_redirects"] = kwargs.get("follow_redirects", True)
         kwargs["timeout"] = kwargs.get("timeout", 60 * 5)
         super().__init__(**kwargs)
+        self.cache_only = False
+
+    @contextmanager
+    def offline(self):
+        """Serve every request made with this session from the cache. Cache misses raise CacheMissError"""
+        previous, self.cache_only = self.cache_only, True
+        try:
+            yield self
+        finally:
+            self.cache_only = previous
+
+    def build_request(self, *args, **kwargs) -> httpx.Request:
+        request = super().build_request(*args, **kwargs)
+        if self.cache_only:
+            request.extensions["cache_only"] = True
+        return request
+
+    def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        return retrier.send(super().send, request, **kwargs)
 
     def get_filename(self, url, path, filename, headers):
         if path.is_dir() or None:
@@ -72,8 +225,25 @@ class PatentClientSession(httpx.Client):
         url,
         method: str = "GET",
         path: tp.Optional[tp.Union[str, Path]] = None,
+        segments: int = 1,
+        verify: bool = False,
+        revalidate: bool = True,
         **kwargs,
     ):
+        """Download ``url`` to ``path``, which can be a file or a directory.
+
+        The file is written to a ``.part`` file next to its destination, and moved into place once
+        it is complete. If the server supports range requests, an interrupted download resumes
+        from where it stopped the next time it is requested, as long as the file's ETag or
+        Last-Modified date hasn't changed. With ``segments`` > 1, the file is fetched as that many
+        byte ranges over parallel connections.
+
+        Every completed download is recorded in the download manifest with its size, ETag and
+        SHA-256 hash. Downloading the same file again is skipped if the file on disk still matches
+        the manifest and, with ``revalidate``, the server confirms that its ETag hasn't changed.
+        Files that don't match are downloaded again. Files are matched by size and modification
+        time; set ``verify`` to check their hashes as well.
+        """
         # Ensure we skip the cache for file downloads
         kwargs["extensions"] = kwargs.get("extensions", dict())
         if "force_cache" in kwargs["extensions"]:
@@ -83,15 +253,195 @@ class PatentClientSession(httpx.Client):
             path = Path(path)
         elif path is None:
             path = Path.cwd()
-        if not path.is_dir() and path.exists():
+        if path.is_dir():
+            entry = self.manifest.find(url, path)
+        else:
+            entry = self.manifest.get(path)
+        headers = httpx.Headers(kwargs.get("headers", dict()))
+        if entry is not None and run_inline(entry.is_intact, verify):
+            if not revalidate or entry.etag is None:
+                return entry.path
+            headers["If-None-Match"] = entry.etag
+        elif entry is not None:
+            logger.warning(f"{entry.path} does not match the download manifest, downloading again")
+        elif not path.is_dir() and path.exists():
             warnings.warn(
                 "File already exists at provided output! Not re-downloading. Please move the file or provide an alternative path to download"
             )
             return path
-        with self.stream(method, url, **kwargs) as response:
+        digest = hashlib.sha256()
+        streamed = False
+        with self.stream(method, url, **{**kwargs, "headers": headers}) as response:
+            if response.status_code == 304 and entry is not None:
+                return entry.path
             response.raise_for_status()
             path = self.get_filename(url, path, response, response.headers)
-            with path.open("wb") as f:
+            part = path.with_name(path.name + ".part")
+            size = int(response.headers.get("Content-Length", 0))
+            encoded = "Content-Encoding" in response.headers
+            ranged = (
+                method == "GET"
+                and response.headers.get("Accept-Ranges") == "bytes"
+                and not encoded
+                and size > 0
+            )
+            if segments > 1 and not hasattr(os, "pwrite"):
+                warnings.warn("Segmented downloads need os.pwrite, downloading in one piece")
+                segments = 1
+            # What is already in the .part file is only used if it is from the same version of
+            # the file, so progress is discarded if the size or the validator has changed. It is
+            # also discarded if the file was split into a different number of segments, since a
+            # segmented .part file is preallocated and its size says nothing about what is done
+            validator = range_validator(response.headers)
+            progress_path = part.with_name(part.name + ".json")
+            progress = read_progress(progress_path) if ranged and part.exists() else None
+            if (
+                progress is None
+                or validator is None
+                or progress.get("size") != size
+                or progress.get("validator") != validator
+                or progress.get("segments", 1) != segments
+            ):
+                progress = None
+            if not ranged or (segments == 1 and progress is None):
+                streamed = True
+                if ranged:
+                    write_progress(progress_path, {"size": size, "validator": validator})
+                with part.open("wb") as f:
+                    for chunk in response.iter_bytes():
+                        digest.update(chunk)
+                        f.write(chunk)
+        if ranged and segments > 1:
+            self._download_segments(url, part, size, segments, validator, progress, **kwargs)
+            streamed = False
+        elif ranged and part.stat().st_size != size:
+            self._resume_download(url, part, size, validator, **kwargs)
+            streamed = False
+        if ranged:
+            progress_path.unlink(missing_ok=True)
+        if size and not encoded and part.stat().st_size != size:
+            raise DownloadError(
+                f"Downloaded {part.stat().st_size} bytes from {url}, but expected {size}"
+            )
+        sha256 = digest.hexdigest() if streamed else run_inline(hash_file, part)
+        part.replace(path)
+        self.manifest.record(url, path, response.headers.get("ETag"), sha256)
+        return path
+
+    def _with_range(
+        self,
+        kwargs: dict,
+        start: int,
+        end: tp.Optional[int] = None,
+        validator: tp.Optional[str] = None,
+    ) -> dict:
+        headers = httpx.Headers(kwargs.get("headers", dict()))
+        headers["Range"] = f"bytes={start}-{end if end is not None else ''}"
+        if validator is not None:
+            headers["If-Range"] = validator
+        return {**kwargs, "headers": headers}
+
+    def _resume_download(self, url, part: Path, size: int, validator: str, **kwargs):
+        # The range request is conditional on the validator, so if the file has changed since
+        # the partial download the server sends all of it, and the download starts over
+        offset = part.stat().st_size
+        if offset > size:
+            offset = 0
+        request_kwargs = self._with_range(kwargs, offset, validator=validator)
+        with self.stream("GET", url, **request_kwargs) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                offset = 0
+            with part.open("r+b") as f:
+                f.seek(offset)
+                f.truncate()
                 for chunk in response.iter_bytes():
                     f.write(chunk)
-        return path
+
+    def _download_segments(
+        self,
+        url,
+        part: Path,
+        size: int,
+        segments: int,
+        validator: tp.Optional[str],
+        progress: tp.Optional[dict],
+        **kwargs,
+    ):
+        # Completed segments are recorded next to the .part file, along with how the file was
+        # split, so that an interrupted segmented download only refetches the segments that
+        # didn't finish. Progress from a download that was split differently is discarded
+        progress_path = part.with_name(part.name + ".json")
+        step = -(-size // segments)
+        state = {
+            "size": size,
+            "validator": validator,
+            "segments": segments,
+            "step": step,
+            "done": list(),
+        }
+        if progress is not None and (progress.get("segments"), progress.get("step")) == (
+            segments,
+            step,
+        ):
+            done = progress.get("done")
+            if isinstance(done, list):
+                state["done"] = [start for start in done if isinstance(start, int)]
+        if not state["done"]:
+            with part.open("wb") as f:
+                f.truncate(size)
+        write_progress(progress_path, state)
+        pending = [
+            (start, min(start + step, size) - 1)
+            for start in range(0, size, step)
+            if start not in state["done"]
+        ]
+        lock = Lock()
+        fd = os.open(part, os.O_RDWR)
+
+        def fetch_segment(segment: tp.Tuple[int, int]):
+            start, end = segment
+            request_kwargs = self._with_range(kwargs, start, end, validator)
+            with self.stream("GET", url, **request_kwargs) as response:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise DownloadError(
+                        f"{url} changed during the download, or does not support range requests"
+                    )
+                offset = start
+                for chunk in response.iter_bytes():
+                    os.pwrite(fd, chunk, offset)
+                    offset += len(chunk)
+            with lock:
+                state["done"].append(start)
+                write_progress(progress_path, state)
+
+        try:
+            thread_map(fetch_segment, pending, concurrency=segments)
+        except DownloadError:
+            progress_path.unlink(missing_ok=True)
+            raise
+        finally:
+            os.close(fd)
+        if sorted(state["done"]) != list(range(0, size, step)):
+            raise DownloadError(f"Not every segment of {url} was downloaded")
+
+
+clients: tp.Dict[str, tp.Tuple[PatentClientSession, dict]] = dict()
+
+
+def get_client(host: str, **kwargs) -> PatentClientSession:
+    """Return the session for ``host``, creating it with ``kwargs`` on first use.
+
+    Sessions share one connection pool, sized by the ``http_*`` settings, so each API gets its
+    own headers and auth without opening its own connections. Later calls for ``host`` may
+    leave out ``kwargs``, but raise ValueError if they pass different ones. APIs that keep
+    per-instance state, like cookies, should create a ``PatentClientSession`` of their own,
+    which shares the same pool.
+    """
+    if host not in clients:
+        clients[host] = (PatentClientSession(**kwargs), kwargs)
+    client, client_kwargs = clients[host]
+    if kwargs and kwargs != client_kwargs:
+        raise ValueError(f"The session for {host} was already created with different arguments")
+    return client
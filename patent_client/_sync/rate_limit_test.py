@@ -0,0 +1,89 @@
+# ********************************************************************************
+# *         WARNING: This file is automatically generated by unasync.py.         *
+# *                             DO NOT MANUALLY EDIT                             *
+# *             Source File: patent_client/_async/rate_limit_test.py             *
+# ********************************************************************************
+
+import time
+
+import httpx
+
+from .rate_limit import RateLimitedTransport, RateLimiter, TokenBucket
+
+OPS_URL = (
+    "https://ops.epo.org/3.2/rest-services/published-data/publication/docdb/EP.1000000.A1/biblio"
+)
+
+
+class TestTokenBucket:
+    def test_rate(self):
+        bucket = TokenBucket(rate=10)
+        assert bucket.capacity == 10
+        for _ in range(10):
+            assert bucket.delay() == 0
+        assert 0 < bucket.delay() <= 0.1
+
+    def test_unlimited(self):
+        bucket = TokenBucket()
+        for _ in range(100):
+            assert bucket.delay() == 0
+        bucket.pause(10)
+        assert 9 < bucket.delay() <= 10
+
+    def test_acquire_waits(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(3):
+            bucket.acquire()
+        assert time.monotonic() - start >= 0.09
+
+
+class TestRateLimiter:
+    def test_seeded_from_settings(self):
+        limiter = RateLimiter(rates={"example.com": 5})
+        assert limiter.bucket("example.com").rate == 5
+        assert limiter.bucket("example.org").rate is None
+
+    def test_ops_throttling_control(self):
+        limiter = RateLimiter(rates={})
+        request = httpx.Request("GET", OPS_URL)
+        assert limiter.bucket_key(request) == "ops.epo.org#retrieval"
+        response = httpx.Response(
+            200,
+            headers={
+                "X-Throttling-Control": "busy (images=green:100, inpadoc=green:45, other=green:1000, "
+                "retrieval=yellow:120, search=black:15)"
+            },
+        )
+        limiter.update(request, response)
+        assert limiter.bucket("ops.epo.org#retrieval").rate == 2
+        assert limiter.bucket("ops.epo.org#inpadoc").rate == 0.75
+        assert limiter.bucket("ops.epo.org#search").delay() > 30
+
+    def test_ppubs_headers(self):
+        limiter = RateLimiter(rates={})
+        request = httpx.Request("POST", "https://ppubs.uspto.gov/api/searches/counts")
+        limiter.update(request, httpx.Response(200, headers={"x-rate-limit-remaining": "10"}))
+        assert limiter.bucket("ppubs.uspto.gov").delay() == 0
+        response = httpx.Response(429, headers={"x-rate-limit-retry-after-seconds": "16"})
+        limiter.update(request, response)
+        assert 15 < limiter.bucket("ppubs.uspto.gov").delay() <= 16
+
+    def test_malformed_headers(self):
+        limiter = RateLimiter(rates={})
+        request = httpx.Request("POST", "https://ppubs.uspto.gov/api/searches/counts")
+        for remaining in ("", "many", "-1", "nan"):
+            headers = {"x-rate-limit-remaining": remaining, "retry-after": "soon"}
+            limiter.update(request, httpx.Response(200, headers=headers))
+        assert limiter.bucket("ppubs.uspto.gov").delay() == 0
+
+
+class TestRateLimitedTransport:
+    def test_updates_limiter(self):
+        network = httpx.MockTransport(
+            lambda request: httpx.Response(429, headers={"Retry-After": "5"})
+        )
+        transport = RateLimitedTransport(network, limiter=RateLimiter(rates={}))
+        response = transport.handle_request(httpx.Request("GET", "https://example.com"))
+        assert response.status_code == 429
+        assert transport.limiter.bucket("example.com").delay() > 4
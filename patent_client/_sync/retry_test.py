@@ -0,0 +1,113 @@
+# ********************************************************************************
+# *         WARNING: This file is automatically generated by unasync.py.         *
+# *                             DO NOT MANUALLY EDIT                             *
+# *               Source File: patent_client/_async/retry_test.py                *
+# ********************************************************************************
+
+import httpx
+import pytest
+
+from patent_client import SETTINGS
+from patent_client.settings import RetryPolicy
+from patent_client.util.concurrency import thread_map
+
+from .retry import Retrier, RetryBudget, get_retry_policy
+
+
+@pytest.fixture(autouse=True)
+def policies(monkeypatch):
+    policies = [
+        RetryPolicy(host=r"^search\.example\.com$", backoff=0.01, methods=["GET", "POST"]),
+        RetryPolicy(backoff=0.01),
+    ]
+    monkeypatch.setattr(SETTINGS, "retry_policies", policies)
+    return policies
+
+
+def flaky(*responses):
+    """A fake send that fails with each of ``responses`` in turn, and then returns a 200"""
+    calls = list()
+
+    def send(request):
+        calls.append(request.content)
+        if len(calls) <= len(responses):
+            response = responses[len(calls) - 1]
+            if isinstance(response, Exception):
+                raise response
+            return httpx.Response(response)
+        return httpx.Response(200)
+
+    return send, calls
+
+
+class TestRetrier:
+    def test_get_retry_policy(self, policies):
+        assert get_retry_policy(httpx.Request("GET", "https://search.example.com")) == policies[0]
+        assert get_retry_policy(httpx.Request("GET", "https://example.com")) == policies[1]
+
+    def test_retries_idempotent_requests(self):
+        send, calls = flaky(502, httpx.ReadTimeout("timeout"), 503)
+        retrier = Retrier()
+        response = retrier.send(send, httpx.Request("GET", "https://example.com"))
+        assert response.status_code == 200
+        assert len(calls) == 4
+
+    def test_gives_up_after_attempts(self):
+        send, calls = flaky(502, 502, 502, 502, 502)
+        retrier = Retrier()
+        response = retrier.send(send, httpx.Request("GET", "https://example.com"))
+        assert response.status_code == 502
+        assert len(calls) == 4
+
+    def test_non_idempotent_requests(self):
+        send, calls = flaky(502)
+        retrier = Retrier()
+        request = httpx.Request("POST", "https://example.com", content=b"data")
+        response = retrier.send(send, request)
+        assert response.status_code == 502
+        assert len(calls) == 1
+
+        # Requests that never reached the server or were rate limited are always retried
+        send, calls = flaky(httpx.ConnectError("refused"), 429)
+        retrier = Retrier()
+        request = httpx.Request("POST", "https://example.com", content=b"data")
+        response = retrier.send(send, request)
+        assert response.status_code == 200
+        assert calls == [b"data"] * 3
+
+    def test_idempotent_post(self):
+        send, calls = flaky(502)
+        retrier = Retrier()
+        request = httpx.Request("POST", "https://search.example.com", content=b"data")
+        assert (retrier.send(send, request)).status_code == 200
+        send, calls = flaky(502)
+        retrier = Retrier()
+        request = httpx.Request(
+            "POST", "https://example.com", content=b"data", extensions={"idempotent": True}
+        )
+        assert (retrier.send(send, request)).status_code == 200
+
+    def test_budget(self):
+        send, calls = flaky(*[502] * 10)
+        retrier = Retrier()
+        retrier.budgets["example.com"] = RetryBudget(ratio=0, per_second=0, burst=2)
+        response = retrier.send(send, httpx.Request("GET", "https://example.com"))
+        assert response.status_code == 502
+        assert len(calls) == 3
+
+
+class TestRetryBudget:
+    def test_budget(self):
+        budget = RetryBudget(ratio=0.5, per_second=0, burst=1)
+        assert budget.withdraw()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert not budget.withdraw()
+        budget.deposit()
+        assert budget.withdraw()
+
+    def test_concurrent_withdrawals(self):
+        budget = RetryBudget(ratio=0, per_second=0, burst=50)
+        allowed = thread_map(lambda _: budget.withdraw(), range(200), concurrency=16)
+        assert sum(allowed) == 50
+        assert budget.balance == 0
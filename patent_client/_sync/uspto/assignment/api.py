@@ -9,7 +9,7 @@ from typing import TYPE_CHECKING, Optional
 
 from yankee.base.schema import ListCollection
 
-from patent_client._sync.http_client import PatentClientSession
+from patent_client._sync.http_client import get_client
 
 from .convert import convert_xml_to_json
 from .model import AssignmentPage
@@ -35,7 +35,7 @@ def validate_input(input, input_name, allowed_values):
         raise ValueError(f"{input_name} must be one of {allowed_values}")
 
 
-client = PatentClientSession()
+client = get_client("assignment-api.uspto.gov")
 
 
 class AssignmentApi:
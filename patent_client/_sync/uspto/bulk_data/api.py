@@ -7,11 +7,11 @@
 import datetime
 import typing as tp
 
-from patent_client._sync.http_client import PatentClientSession
+from patent_client._sync.http_client import get_client
 
 from .model import Product
 
-client = PatentClientSession()
+client = get_client("bulkdata.uspto.gov")
 
 
 class BulkDataApi:
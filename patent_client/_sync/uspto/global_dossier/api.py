@@ -9,15 +9,16 @@ from urllib.parse import urljoin
 
 import lxml.etree as ET
 
-from patent_client._sync.http_client import PatentClientSession
+from patent_client._sync.http_client import get_client
 
 from .model import DocumentList, GlobalDossier
 
-client = PatentClientSession(
+client = get_client(
+    "globaldossier.uspto.gov",
     headers={
         "Authorization": "OQmPwAN1QD4OXe25jpmMD27zmnM21gIL0lg85G6j",
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/21.1.1.164 Safari/602.1.507",
-    }
+    },
 )
 
 
@@ -20,7 +20,6 @@ if tp.TYPE_CHECKING:
         CustomerNumber,
         Document,
         ForeignPriority,
-        SearchResult,
         TermAdjustment,
         Transaction,
         USApplication,
@@ -37,16 +36,19 @@ class USApplicationManager(Manager):
     def count(self):
         return (api.post_search(self._create_search_obj(fields=["applicationNumberText"])))["count"]
 
-    def _get_results(self) -> tp.Iterator["SearchResult"]:
-        query_obj = self._create_search_obj()
-        for start, rows in get_start_and_row_count(self.config.limit):
-            page_query = query_obj.model_dump()
-            page_query["pagination"] = {"offset": start, "limit": rows}
-            page_query_obj = SearchRequest(**page_query)
-            for result in (api.post_search(page_query_obj))["patentBag"]:
-                app_id = result["applicationNumberText"]
-                app = api.get_application_data(app_id)
-                yield app
+    def _page_ranges(self):
+        return get_start_and_row_count(self.config.limit)
+
+    def _search_page(self, start, rows, fields=None) -> tp.List[tp.Dict]:
+        page_query = self._create_search_obj(fields=fields).model_dump()
+        page_query["pagination"] = {"offset": start, "limit": rows}
+        return (api.post_search(SearchRequest(**page_query)))["patentBag"]
+
+    def _get_page(self, start, rows) -> tp.List["USApplication"]:
+        return [
+            api.get_application_data(result["applicationNumberText"])
+            for result in self._search_page(start, rows)
+        ]
 
     def _create_search_obj(self, fields: tp.Optional[tp.List[str]] = None):
         if fields is None:
@@ -85,14 +87,11 @@ class USApplicationBiblioManager(USApplicationManager):
     ]
     response_model = USApplicationBiblio
 
-    def _get_results(self) -> tp.Iterator["SearchResult"]:
-        query_obj = self._create_search_obj(fields=self.default_fields)
-        for start, rows in get_start_and_row_count(self.config.limit):
-            page_query = query_obj.model_dump()
-            page_query["pagination"] = {"offset": start, "limit": rows}
-            page_query_obj = SearchRequest(**page_query)
-            for result in (api.post_search(page_query_obj))["patentBag"]:
-                yield self.response_model(**result)
+    def _get_page(self, start, rows) -> tp.List["USApplicationBiblio"]:
+        return [
+            self.response_model(**result)
+            for result in self._search_page(start, rows, fields=self.default_fields)
+        ]
 
     def get(self, *args, **kwargs):
         if len(args) == 1 and not kwargs:
@@ -10,7 +10,7 @@ from typing import Dict, List, Optional
 
 from httpx._exceptions import HTTPStatusError
 
-from patent_client._sync.http_client import PatentClientSession
+from patent_client._sync.http_client import get_client
 
 from .model import Document, PedsPage
 
@@ -22,7 +22,7 @@ type_map = {
     "int": int,
     "text_ws": str,
 }
-client = PatentClientSession()
+client = get_client("ped.uspto.gov")
 
 
 class PedsDownException(Exception):
@@ -4,13 +4,11 @@
 # *           Source File: patent_client/_async/uspto/ptab/manager.py            *
 # ********************************************************************************
 
-from copy import deepcopy
 from typing import Callable, Generic, Optional
 
 import inflection
 
 from patent_client.util.manager import Manager, ModelType
-from patent_client.util.request_util import get_start_and_row_count
 
 from .api import PtabApi
 from .model import PtabDecision, PtabDocument, PtabProceeding
@@ -20,29 +18,24 @@ from .util import peds_to_ptab
 class PtabManager(Manager, Generic[ModelType]):
     url = "https://developer.uspto.gov/ptab-api"
     page_size = 25
+    random_access = True
     instance_schema = None
     api_method: Optional[Callable] = None
 
-    def _get_results(self):
-        query = deepcopy(self.config.filter)
-        query = peds_to_ptab(query)
+    def _get_page(self, start, rows):
+        query = peds_to_ptab(dict(self.config.filter))
         query["sort"] = " ".join(
             inflection.camelize(o, uppercase_first_letter=False) for o in self.config.order_by
         )
-        for start, rows in get_start_and_row_count(
-            self.config.limit, self.config.offset, self.page_size
-        ):
-            query["start"] = start
-            query["rows"] = rows
-            page = self.api_method(**query)
-            for doc in page.docs:
-                yield doc
-            if len(page.docs) < rows:
-                break
+        query["start"] = start
+        query["rows"] = rows
+        page = self.api_method(**query)
+        return page.docs
 
     def count(self):
-        page = self.api_method(**peds_to_ptab(self.config.filter))
-        return min(self.config.limit, page.num_found) if self.config.limit else page.num_found
+        page = self.api_method(**peds_to_ptab(dict(self.config.filter)))
+        max_len = page.num_found - self.config.offset
+        return min(self.config.limit, max_len) if self.config.limit else max_len
 
     # def allowed_filters(self):
     #    params = schema_doc["paths"][self.path]["get"]["parameters"]
@@ -6,20 +6,37 @@
 
 import json
 import time
+import typing as tp
+from collections import OrderedDict
 from copy import deepcopy
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from pathlib import Path
 
 import httpx
+from hishel._synchronization import Lock
 
+from patent_client import SETTINGS
 from patent_client._sync.http_client import PatentClientSession
 
 from .model import PublicSearchBiblioPage, PublicSearchDocument
+from .session import OFFLINE_SESSION, PublicSearchSession, SessionStore
+
+# How many counts responses PublicSearchApi keeps
+max_counts = 1024
 
 
 class UsptoException(Exception):
     pass
 
 
+def set_case_id(data, case_id):
+    """Point a request body at the case of the current session"""
+    if isinstance(data, dict):
+        if "caseId" in data:
+            data["caseId"] = case_id
+        set_case_id(data.get("query"), case_id)
+
+
 def force_list(obj):
     if not isinstance(obj, list):
         return [
@@ -29,25 +46,100 @@ def force_list(obj):
 
 
 class PublicSearchApi:
-    def __init__(self):
+    """
+    Client for the PPUBS search API.
+
+    PPUBS needs a session, which is started on first use and replaced shortly before it
+    expires, or when the server rejects it. Only one coroutine or thread starts a session at
+    a time, and the others wait for it. Sessions are kept in ``session_store``, so that other
+    processes can use them too.
+
+    Each request carries the access token and cookies of the session it was sent with, so
+    that replacing the session doesn't affect requests that are already in flight. Offline,
+    no session is started, and cached responses are used whatever session they came from.
+    """
+
+    def __init__(self, session_store: tp.Optional[SessionStore] = None):
+        # Each instance has its own client, which shares the connection pool. The client
+        # keeps no cookies of its own, see _send. It doesn't send no-cache either, so that
+        # searches are served from the cache according to their cache policy
         self.client = PatentClientSession(
             headers={
                 "X-Requested-With": "XMLHttpRequest",
                 "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36",
                 "Origin": "https://ppubs.uspto.gov",
                 "Referer": "https://ppubs.uspto.gov/pubwebapp/",
-                "Pragma": "no-cache",
-                "Cache-Control": "no-cache",
                 "Priority": "u=1, i",
             },
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
             http2=True,
             follow_redirects=True,
         )
         self.session = dict()
         self.case_id = None
+        self.access_token = None
+        self.session_store = session_store if session_store is not None else SessionStore()
+        self._session: tp.Optional[PublicSearchSession] = None
+        self._session_lock = Lock()
         self.queries = dict()
+        self.counts: OrderedDict[str, dict] = OrderedDict()
         self.search_query = json.loads((Path(__file__).parent / "search_query.json").read_text())
 
+    @property
+    def offline(self) -> bool:
+        return SETTINGS.offline or self.client.cache_only
+
+    def _query_data(
+        self,
+        query,
+        default_operator="OR",
+        sources=["US-PGPUB", "USPAT", "USOCR"],
+        expand_plurals=True,
+        british_equivalents=True,
+    ) -> dict:
+        data = deepcopy(self.search_query["query"])
+        data["caseId"] = self.case_id
+        data["op"] = default_operator
+        data["q"] = query
+        data["queryName"] = query
+        data["userEnteredQuery"] = query
+        data["databaseFilters"] = [{"databaseName": s, "countryCodes": []} for s in sources]
+        data["plurals"] = expand_plurals
+        data["britishEquivalents"] = british_equivalents
+        return data
+
+    def get_counts(self, query_data: dict, session: PublicSearchSession) -> dict:
+        """POST a query to the counts endpoint, which PPUBS expects before a query is searched.
+
+        This is done once per query and session, and always reaches the server, since a
+        cached response would leave the new session without its counts. The response, which
+        includes the number of results, is kept and reused for later pages of the same query
+        and for ``count``.
+        """
+        key = json.dumps([{**query_data, "caseId": None}, session.access_token], sort_keys=True)
+        if key in self.counts:
+            self.counts.move_to_end(key)
+            return self.counts[key]
+        response = self._send(
+            session,
+            "POST",
+            "https://ppubs.uspto.gov/dirsearch-public/searches/counts",
+            json=query_data,
+            # Stored for offline use, but never answered from the cache while online
+            headers={"Cache-Control": "no-cache"},
+        )
+        response.raise_for_status()
+        self.counts[key] = response.json()
+        while len(self.counts) > max_counts:
+            self.counts.popitem(last=False)
+        return self.counts[key]
+
+    def count(self, query, **kwargs) -> int:
+        """The number of results for ``query``, which takes the same arguments as ``run_query``"""
+        query_data = self._query_data(query, **kwargs)
+        counts = self._with_session(lambda session: self.get_counts(query_data, session))
+        return counts["numResults"]
+
     def run_query(
         self,
         query,
@@ -59,30 +151,21 @@ class PublicSearchApi:
         expand_plurals=True,
         british_equivalents=True,
     ) -> "PublicSearchBiblioPage":
-        if self.case_id is None:
-            self.get_session()
         data = deepcopy(self.search_query)
         data["start"] = start
         data["pageCount"] = limit
         data["sort"] = sort
-        data["query"]["caseId"] = self.case_id
-        data["query"]["op"] = default_operator
-        data["query"]["q"] = query
-        data["query"]["queryName"] = query
-        data["query"]["userEnteredQuery"] = query
-        data["query"]["databaseFilters"] = [
-            {"databaseName": s, "countryCodes": []} for s in sources
-        ]
-        data["query"]["plurals"] = expand_plurals
-        data["query"]["britishEquivalents"] = british_equivalents
-        counts = self.make_request(
-            "POST",
-            "https://ppubs.uspto.gov/dirsearch-public/searches/counts",
-            json=data["query"],
+        data["query"] = self._query_data(
+            query, default_operator, sources, expand_plurals, british_equivalents
         )
-        counts.raise_for_status()
         search_url = "https://ppubs.uspto.gov/dirsearch-public/searches/searchWithBeFamily"
-        query_response = self.make_request("POST", search_url, json=data)
+
+        def search(session):
+            # A new session gets its own counts before the search
+            self.get_counts(data["query"], session)
+            return self._send(session, "POST", search_url, json=data)
+
+        query_response = self._with_session(search)
         query_response.raise_for_status()
         result = query_response.json()
         if result.get("error", None) is not None:
@@ -92,15 +175,28 @@ class PublicSearchApi:
         return PublicSearchBiblioPage.model_validate(result)
 
     def make_request(self, method, url, **kwargs):
-        response = self.client.request(method, url, **kwargs)
-        if response.status_code == 403:
-            self.get_session()
-            response = self.client.request(method, url, **kwargs)
-        if response.status_code == 429:
-            wait_time = int(response.headers["x-rate-limit-retry-after-seconds"]) + 1
-            time.sleep(wait_time)
-            response = self.client.request(method, url, **kwargs)
-        return response
+        return self._with_session(lambda session: self._send(session, method, url, **kwargs))
+
+    def _send(self, session: PublicSearchSession, method, url, **kwargs):
+        """Send a request with ``session``'s case id, access token and cookies"""
+        set_case_id(kwargs.get("json"), session.case_id)
+        kwargs["headers"] = {**kwargs.get("headers", dict()), **session.headers}
+        return self.client.request(method, url, **kwargs)
+
+    def _with_session(self, send):
+        """Call ``send`` with the current session. If the server rejects the session, call it
+        again with a new one"""
+        session = self.ensure_session()
+        try:
+            response = send(session)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 403:
+                raise
+        else:
+            if not isinstance(response, httpx.Response) or response.status_code != 403:
+                return response
+        session = self.ensure_session(stale_token=session.access_token)
+        return send(session)
 
     def get_document(self, bib) -> "PublicSearchDocument":
         url = f"https://ppubs.uspto.gov/dirsearch-public/internal/patents/{bib.guid}/highlight"
@@ -114,9 +210,41 @@ class PublicSearchApi:
         response.raise_for_status()
         return PublicSearchDocument.model_validate(response.json())
 
+    def ensure_session(self, stale_token: tp.Optional[str] = None) -> PublicSearchSession:
+        """Return a session that is good to use, starting a new one if needed.
+
+        ``stale_token`` is the access token of a session that the server rejected. If another
+        caller has already replaced it, its replacement is returned without starting another.
+        """
+        with self._session_lock:
+            session = self._session
+            if session is not None and session.access_token != stale_token and session.is_fresh():
+                return session
+            stored = self.session_store.load()
+            if self.offline:
+                # Case ids and access tokens are left out of cache keys, so any session will do
+                return session or stored or OFFLINE_SESSION
+            # Another process may have started a session already
+            if stored is not None and stored.access_token != stale_token and stored.is_fresh():
+                self._use_session(stored)
+                return stored
+            self.get_session()
+            return self._session
+
+    def _use_session(self, session: PublicSearchSession) -> None:
+        self._session = session
+        self.case_id = session.case_id
+        self.access_token = session.access_token
+
     def get_session(self):
-        self.client.cookies = httpx.Cookies()
-        response = self.client.get("https://ppubs.uspto.gov/pubwebapp/")
+        """Start a new session. Use ``ensure_session`` instead, which starts one only when needed"""
+        cookies = httpx.Cookies()
+        # The page sets the session's cookies, so it must come from the server
+        response = self.client.get(
+            "https://ppubs.uspto.gov/pubwebapp/", extensions={"cache_disabled": True}
+        )
+        for r in (*response.history, response):
+            cookies.update(r.cookies)
         url = "https://ppubs.uspto.gov/dirsearch-public/users/me/session"
         response = self.client.post(
             url,
@@ -124,12 +252,20 @@ class PublicSearchApi:
             headers={
                 "X-Access-Token": "null",
                 "referer": "https://ppubs.uspto.gov/pubwebapp/",
+                **PublicSearchSession.cookie_header(dict(cookies.items())),
             },
         )  # json=str(random.randint(10000, 99999)))
+        response.raise_for_status()
+        cookies.update(response.cookies)
         self.session = response.json()
-        self.case_id = self.session["userCase"]["caseId"]
-        self.access_token = response.headers["X-Access-Token"]
-        self.client.headers["X-Access-Token"] = self.access_token
+        self._use_session(
+            PublicSearchSession.create(
+                self.session["userCase"]["caseId"],
+                response.headers["X-Access-Token"],
+                dict(cookies.items()),
+            )
+        )
+        self.session_store.save(self._session)
         return self.session
 
     def _request_save(self, obj):
@@ -137,7 +273,8 @@ class PublicSearchApi:
             f"{obj.image_location}/{i:0>8}.tif"
             for i in range(1, obj.document_structure.page_count + 1)
         ]
-        response = self.client.post(
+        response = self.make_request(
+            "POST",
             "https://ppubs.uspto.gov/dirsearch-public/internal/print/imageviewer",
             json={
                 "caseId": self.case_id,
@@ -155,15 +292,10 @@ class PublicSearchApi:
         out_path = Path(path).expanduser() / f"{obj.guid}.pdf"
         if out_path.exists():
             return out_path
-        if self.case_id is None:
-            self.get_session()
-        try:
-            print_job_id = self._request_save(obj)
-        except httpx.HTTPStatusError:
-            self.get_session()
-            print_job_id = self._request_save(obj)
+        print_job_id = self._request_save(obj)
         while True:
-            response = self.client.post(
+            response = self.make_request(
+                "POST",
                 "https://ppubs.uspto.gov/dirsearch-public/internal/print/print-process",
                 json=[
                     print_job_id,
@@ -175,11 +307,13 @@ class PublicSearchApi:
                 break
             time.sleep(1)
         pdf_name = print_data[0]["pdfName"]
+        session = self.ensure_session()
         with out_path.open("wb") as f:
             try:
                 request = self.client.build_request(
                     "GET",
                     f"https://ppubs.uspto.gov/dirsearch-public/internal/print/save/{pdf_name}",
+                    headers=session.headers,
                 )
                 response = self.client.send(request, stream=True)
                 response.raise_for_status()
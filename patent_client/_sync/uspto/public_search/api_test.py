@@ -4,7 +4,23 @@
 # *      Source File: patent_client/_async/uspto/public_search/api_test.py       *
 # ********************************************************************************
 
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from patent_client._sync.cache import (
+    CacheMissError,
+    MeteredCacheTransport,
+    PolicyController,
+    SQLiteCacheStorage,
+)
+from patent_client._sync.http_client import PatentClientSession, cache_key_generator
+
 from .api import PublicSearchApi
+from .session import SessionStore
 
 
 def test_simple_search():
@@ -14,3 +30,191 @@ def test_simple_search():
     )
     assert results.num_found == 1
     assert results.docs[0].publication_number == "6013599"
+
+
+def ppubs_server(reject=()):
+    """A PPUBS stand-in that finds three documents for every query. It records the last part
+    of each request path and the case id of each counts request, and rejects the tokens in
+    ``reject``. The requests themselves are kept in ``transport.requests``"""
+    paths = list()
+    case_ids = list()
+    requests = list()
+    sessions = iter(range(1, 100))
+
+    def handler(request):
+        name = request.url.path.rstrip("/").rsplit("/", 1)[-1]
+        paths.append(name)
+        requests.append(request)
+        time.sleep(0.01)
+        if name == "pubwebapp":
+            return httpx.Response(200, text="<html></html>")
+        if name == "session":
+            case_id = next(sessions)
+            return httpx.Response(
+                200,
+                json={"userCase": {"caseId": case_id}},
+                headers={
+                    "X-Access-Token": f"token-{case_id}",
+                    "Set-Cookie": f"JSESSIONID=session-{case_id}; Path=/",
+                },
+            )
+        if request.headers.get("X-Access-Token") in reject:
+            return httpx.Response(403)
+        if name == "counts":
+            case_ids.append(json.loads(request.content)["caseId"])
+            return httpx.Response(200, json={"numResults": 3})
+        return httpx.Response(200, json={"numFound": 3, "perPage": 1, "page": 1, "docs": []})
+
+    transport = httpx.MockTransport(handler)
+    transport.requests = requests
+    return transport, paths, case_ids
+
+
+def mock_api(transport, tmp_path):
+    api = PublicSearchApi(session_store=SessionStore(tmp_path / "ppubs_session.json"))
+    # Keeps the headers and cookie jar of the real client, only replacing the transport
+    api.client = PatentClientSession(
+        transport=transport, headers=api.client.headers, cookies=api.client.cookies.jar
+    )
+    return api
+
+
+def caching_transport(transport, tmp_path):
+    return MeteredCacheTransport(
+        transport=transport,
+        storage=SQLiteCacheStorage(tmp_path / "cache.sqlite"),
+        controller=PolicyController(key_generator=cache_key_generator),
+    )
+
+
+@pytest.mark.no_vcr
+class TestCounts:
+    def test_counts_once_per_query(self, tmp_path):
+        transport, paths, _ = ppubs_server()
+        api = mock_api(transport, tmp_path)
+        assert api.count('("6013599").pn.') == 3
+        api.run_query('("6013599").pn.', start=0, limit=1)
+        api.run_query('("6013599").pn.', start=1, limit=1)
+        assert paths == [
+            "pubwebapp",
+            "session",
+            "counts",
+            "searchWithBeFamily",
+            "searchWithBeFamily",
+        ]
+        api.run_query('("6013600").pn.', start=0, limit=1)
+        assert paths[5:] == ["counts", "searchWithBeFamily"]
+
+    def test_counts_are_posted_for_a_new_session(self, tmp_path):
+        reject = set()
+        transport, paths, case_ids = ppubs_server(reject=reject)
+        api = mock_api(transport, tmp_path)
+        api.count('("6013599").pn.')
+        reject.add("token-1")
+        api.run_query('("6013599").pn.', start=0, limit=1)
+        # The rejected search is repeated with a new session, which gets its own counts first
+        assert paths[3:] == [
+            "searchWithBeFamily",
+            "pubwebapp",
+            "session",
+            "counts",
+            "searchWithBeFamily",
+        ]
+        assert case_ids == [1, 2]
+
+    def test_counts_are_not_served_from_the_cache(self, tmp_path):
+        transport, _, case_ids = ppubs_server()
+        transport = caching_transport(transport, tmp_path)
+        mock_api(transport, tmp_path / "first").count('("6013599").pn.')
+        mock_api(transport, tmp_path / "second").count('("6013599").pn.')
+        assert case_ids == [1, 2]
+        transport.close()
+
+    def test_searches_are_served_from_the_cache(self, tmp_path):
+        transport, paths, _ = ppubs_server()
+        transport = caching_transport(transport, tmp_path)
+        api = mock_api(transport, tmp_path)
+        api.run_query('("6013599").pn.', start=0, limit=1)
+        api.run_query('("6013599").pn.', start=0, limit=1)
+        assert paths.count("searchWithBeFamily") == 1
+        transport.close()
+
+
+@pytest.mark.no_vcr
+class TestSession:
+    def test_session_is_started_once(self, tmp_path):
+        transport, paths, _ = ppubs_server()
+        api = mock_api(transport, tmp_path)
+        list(ThreadPoolExecutor(5).map(api.count, [f'"{i}".pn.' for i in range(5)]))
+        assert paths.count("session") == 1
+
+    def test_rejected_session_is_replaced_once(self, tmp_path):
+        transport, paths, case_ids = ppubs_server(reject={"token-1"})
+        api = mock_api(transport, tmp_path)
+        counts = list(ThreadPoolExecutor(5).map(api.count, [f'"{i}".pn.' for i in range(5)]))
+        assert counts == [3] * 5
+        assert paths.count("session") == 2
+        # Retried requests are sent with the new session's case
+        assert case_ids == [2] * 5
+
+    def test_session_is_shared_through_the_store(self, tmp_path):
+        transport, paths, _ = ppubs_server()
+        mock_api(transport, tmp_path).count('"1".pn.')
+        mock_api(transport, tmp_path).count('"2".pn.')
+        assert paths.count("session") == 1
+
+    def test_expired_session_is_replaced(self, tmp_path):
+        transport, paths, case_ids = ppubs_server()
+        api = mock_api(transport, tmp_path)
+        api.count('"1".pn.')
+        api._session.expires_at = time.time()
+        api.session_store.clear()
+        api.count('"2".pn.')
+        assert paths.count("session") == 2
+        assert case_ids == [1, 2]
+
+    def test_sessions_are_per_instance(self, tmp_path):
+        transport, _, _ = ppubs_server()
+        first = mock_api(transport, tmp_path / "first")
+        second = mock_api(transport, tmp_path / "second")
+        first.count('"1".pn.')
+        second.count('"1".pn.')
+        first.count('"2".pn.')
+        # Each request carries the token and cookies of its own instance's session
+        sent = [
+            (r.headers.get("X-Access-Token"), r.headers.get("Cookie"))
+            for r in transport.requests
+            if r.url.path.endswith("counts")
+        ]
+        assert sent == [
+            ("token-1", "JSESSIONID=session-1"),
+            ("token-2", "JSESSIONID=session-2"),
+            ("token-1", "JSESSIONID=session-1"),
+        ]
+        # And the clients themselves keep no session state
+        for api in (first, second):
+            assert "X-Access-Token" not in api.client.headers
+            assert not api.client.cookies
+
+
+@pytest.mark.no_vcr
+class TestOffline:
+    def test_recorded_search_is_replayed(self, tmp_path):
+        transport, paths, _ = ppubs_server()
+        transport = caching_transport(transport, tmp_path)
+        api = mock_api(transport, tmp_path / "online")
+        assert api.count('("6013599").pn.') == 3
+        online = api.run_query('("6013599").pn.', start=0, limit=1)
+        recorded = len(paths)
+
+        # A new instance without a stored session replays the search without starting one
+        api = mock_api(transport, tmp_path / "offline")
+        with api.client.offline():
+            assert api.count('("6013599").pn.') == 3
+            offline = api.run_query('("6013599").pn.', start=0, limit=1)
+            with pytest.raises(CacheMissError):
+                api.count('("6013600").pn.')
+        assert offline.num_found == online.num_found
+        assert len(paths) == recorded
+        assert not api.session_store.path.exists()
+        transport.close()
@@ -4,10 +4,14 @@
 # *       Source File: patent_client/_async/uspto/public_search/manager.py       *
 # ********************************************************************************
 
-from typing import Generic, Iterator, TypeVar
+import datetime
+from collections import defaultdict
+from typing import Generic, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
+from typing_extensions import Self
+
+from patent_client.util.concurrency import thread_map, thread_ordered_map
 from patent_client.util.manager import Manager
-from patent_client.util.request_util import get_start_and_row_count
 
 from .api import PublicSearchApi
 from .model import (
@@ -19,6 +23,7 @@ from .model import (
     PublishedApplicationBiblio,
 )
 from .query import QueryBuilder
+from .util import number_key
 
 
 class CapacityException(Exception):
@@ -30,17 +35,28 @@ class FinishedException(Exception):
 
 
 T = TypeVar("T")
+# A part of a crawl: a publication date range, and the sources searched if not all of them
+CrawlSlice = Tuple[datetime.date, datetime.date, Optional[Tuple[str, ...]]]
+
 public_search_api = PublicSearchApi()
 
 
 class GenericPublicSearchManager(Manager, Generic[T]):
     page_size = 500
+    random_access = True
+    batch_size = 100
     default_filter = "patent_number"
     query_builder = QueryBuilder()
 
     @property
     def _query(self):
-        return self.query_builder.build_query(self.config)
+        query = self.query_builder.build_query(self.config)
+        date_slice = self.config.options.get("date_slice")
+        if date_slice is not None:
+            query = (
+                f"({query}) AND {self.query_builder.date_range('publication_date', *date_slice)}"
+            )
+        return query
 
     @property
     def _order_by(self):
@@ -55,35 +71,112 @@ class GenericPublicSearchManager(Manager, Generic[T]):
         return self.query_builder.order_by_keywords
 
     def count(self):
-        query = self._query
-        order_by = self._order_by
+        # The counts request is remembered, so the first page of results doesn't repeat it
         sources = self.config.options.get("sources", ["US-PGPUB", "USPAT", "USOCR"])
-        page = public_search_api.run_query(
-            query=query, start=0, limit=self.page_size, sort=order_by, sources=sources
-        )
-        max_len = page.num_found - self.config.offset
+        num_found = public_search_api.count(query=self._query, sources=sources)
+        max_len = num_found - self.config.offset
         return min(self.config.limit, max_len) if self.config.limit else max_len
 
+    def _get_batch(self, ids):
+        # One search for all of the numbers, whatever the limit and offset of this manager.
+        # Numbers that match anything but exactly one result are left to get(), so they fail
+        # the same way they would on their own
+        results = defaultdict(list)
+        for doc in self.filter(*ids)._with_config(limit=None, offset=0):
+            results[number_key(doc.publication_number)].append(doc)
+        return {id: results[number_key(id)][0] for id in ids if len(results[number_key(id)]) == 1}
+
 
 class GenericPublicSearchBiblioManager(GenericPublicSearchManager, Generic[T]):
+    def _get_page(self, start: int, rows: int) -> List[T]:
+        page = public_search_api.run_query(
+            query=self._query,
+            start=start,
+            limit=rows,
+            sort=self._order_by,
+            sources=self.config.options.get("sources", ["US-PGPUB", "USPAT", "USOCR"]),
+        )
+        return page.docs
+
     def _get_results(self) -> Iterator[T]:
-        query = self._query
-        order_by = self._order_by
-        sources = self.config.options.get("sources", ["US-PGPUB", "USPAT", "USOCR"])
-        for start, rows in get_start_and_row_count(
-            self.config.limit, self.config.offset, self.page_size
-        ):
-            page = public_search_api.run_query(
-                query=query,
-                start=start,
-                limit=rows,
-                sort=order_by,
-                sources=sources,
-            )
-            for obj in page.docs:
-                yield obj
-            if len(page.docs) < rows:
-                break
+        """With ``.option(crawl=n)``, the query is split into publication date ranges of at most
+        ``n`` results each (``crawl=True`` is one page per range). A single day with more than
+        ``n`` results is split by source, and raises CapacityException if a source still has
+        more. The ranges are fetched ``.option(concurrency=n)`` at a time, oldest first, and
+        documents that turn up in more than one range are only yielded once.
+
+        This gets around the PPUBS capacity limit on documents, and makes large searches
+        faster. The search order only applies within each date range.
+        """
+        crawl = self.config.options.get("crawl")
+        if not crawl:
+            for doc in super()._get_results():
+                yield doc
+            return
+        size = self.page_size if crawl is True else crawl
+        concurrency = self.config.options.get("concurrency", 1)
+        offset, limit = self.config.offset, self.config.limit
+        seen = set()
+        for docs in thread_ordered_map(self._get_slice, self._date_slices(size), concurrency):
+            for doc in docs:
+                if doc.guid in seen:
+                    continue
+                seen.add(doc.guid)
+                if len(seen) <= offset:
+                    continue
+                yield doc
+                if limit and len(seen) >= offset + limit:
+                    return
+
+    def _slice(self, crawl_slice: CrawlSlice) -> Self:
+        start, end, sources = crawl_slice
+        options = self.config.options.set(crawl=None, date_slice=(start, end))
+        if sources is not None:
+            options = options.set(sources=sources)
+        return self._with_config(options=options, limit=None, offset=0)
+
+    def _count_slice(self, crawl_slice: CrawlSlice) -> int:
+        return self._slice(crawl_slice).count()
+
+    def _get_slice(self, crawl_slice: CrawlSlice) -> List[T]:
+        return [doc for doc in Manager._get_results(self._slice(crawl_slice))]
+
+    def _date_slices(self, size: int) -> Iterator[CrawlSlice]:
+        """Bisect the publication dates until each range has at most ``size`` results. A single
+        day with more results than that is split by source instead. The slices at each level of
+        the bisection are counted concurrently"""
+        start, end = self.config.options.get(
+            "crawl_dates", (datetime.date(1790, 1, 1), datetime.date.today())
+        )
+        sources = tuple(self.config.options.get("sources", ["US-PGPUB", "USPAT", "USOCR"]))
+        concurrency = self.config.options.get("concurrency", 1)
+        slices = list()
+        pending = [(start, end, None)]
+        while pending:
+            counts = thread_map(self._count_slice, pending, concurrency=concurrency)
+            split = list()
+            for (start, end, slice_sources), count in zip(pending, counts):
+                if count == 0:
+                    continue
+                if count <= size:
+                    slices.append((start, end, slice_sources))
+                elif start < end:
+                    middle = start + (end - start) // 2
+                    split += [
+                        (start, middle, slice_sources),
+                        (middle + datetime.timedelta(days=1), end, slice_sources),
+                    ]
+                elif slice_sources is None and len(sources) > 1:
+                    split += [(start, end, (source,)) for source in sources]
+                else:
+                    source = ", ".join(slice_sources or sources)
+                    raise CapacityException(
+                        f"{count} results were published on {start} in {source}, more than the "
+                        f"crawl size of {size}. Please use a larger crawl size"
+                    )
+            pending = split
+        for crawl_slice in sorted(slices, key=lambda s: (s[0], s[1], s[2] or ())):
+            yield crawl_slice
 
 
 capacity_limit = 501
@@ -91,15 +184,43 @@ capacity_limit = 501
 
 class GenericPublicSearchDocumentManager(GenericPublicSearchBiblioManager, Generic[T]):
     def _get_results(self) -> Iterator["PublicSearchDocument"]:
-        result_count = super().count()
-        if result_count > capacity_limit:
-            raise CapacityException(
-                f"Query would result in more than 501 results! ({result_count} > 20).\nPlease use the associated Biblio method to reduce load on the API (PublicSearch / PatentBiblio / PublishedApplicationBiblio"
-            )
-        for obj in super()._get_results():
-            doc = public_search_api.get_document(obj)
+        # Crawls are split into date ranges under the capacity limit, see the biblio manager
+        if not self.config.options.get("crawl"):
+            result_count = super().count()
+            if result_count > capacity_limit:
+                raise CapacityException(
+                    f"Query would result in more than 501 results! ({result_count} > 20).\nPlease use the associated Biblio method to reduce load on the API (PublicSearch / PatentBiblio / PublishedApplicationBiblio"
+                )
+        # Documents are fetched .option(concurrency=n) at a time, and yielded in search order.
+        # PPUBS rate limit headers are honoured by the shared transport
+        concurrency = self.config.options.get("concurrency", 1)
+        for doc in thread_ordered_map(
+            public_search_api.get_document, super()._get_results(), concurrency
+        ):
             yield doc
 
+    def get_many(
+        self, ids: Iterable, concurrency: int = 8, return_exceptions: bool = True
+    ) -> Iterator[T | Exception]:
+        # The numbers are looked up in batches with the biblio manager, and the documents are
+        # then fetched up to concurrency at a time, in the order of ids
+        biblios = GenericPublicSearchBiblioManager(self.config).get_many(
+            ids, concurrency=concurrency, return_exceptions=True
+        )
+
+        def get_document(biblio):
+            if isinstance(biblio, Exception):
+                return biblio
+            try:
+                return public_search_api.get_document(biblio)
+            except Exception as e:
+                return e
+
+        for result in thread_ordered_map(get_document, biblios, concurrency):
+            if isinstance(result, Exception) and not return_exceptions:
+                raise result
+            yield result
+
 
 class PublicSearchBiblioManager(GenericPublicSearchBiblioManager[PublicSearchBiblio]):
     pass
@@ -112,17 +233,13 @@ class PublicSearchDocumentManager(GenericPublicSearchDocumentManager[PublicSearc
 class PatentBiblioManager(GenericPublicSearchBiblioManager[PatentBiblio]):
     def __init__(self, config=None):
         super().__init__(config=config)
-        self.config.options["sources"] = [
-            "USPAT",
-        ]
+        self.config = self.config.replace(options=self.config.options.set(sources=["USPAT"]))
 
 
 class PatentManager(GenericPublicSearchDocumentManager[Patent]):
     def __init__(self, config=None):
         super().__init__(config=config)
-        self.config.options["sources"] = [
-            "USPAT",
-        ]
+        self.config = self.config.replace(options=self.config.options.set(sources=["USPAT"]))
 
 
 class PublishedApplicationBiblioManager(
@@ -130,14 +247,10 @@ class PublishedApplicationBiblioManager(
 ):
     def __init__(self, config=None):
         super().__init__(config=config)
-        self.config.options["sources"] = [
-            "US-PGPUB",
-        ]
+        self.config = self.config.replace(options=self.config.options.set(sources=["US-PGPUB"]))
 
 
 class PublishedApplicationManager(GenericPublicSearchDocumentManager[PublishedApplication]):
     def __init__(self, config=None):
         super().__init__(config=config)
-        self.config.options["sources"] = [
-            "US-PGPUB",
-        ]
+        self.config = self.config.replace(options=self.config.options.set(sources=["US-PGPUB"]))
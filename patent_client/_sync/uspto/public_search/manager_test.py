@@ -4,6 +4,12 @@
 # *    Source File: patent_client/_async/uspto/public_search/manager_test.py     *
 # ********************************************************************************
 
+import re
+import threading
+import time
+from datetime import date
+from types import SimpleNamespace
+
 import pytest
 
 from . import (
@@ -13,6 +19,8 @@ from . import (
     PublishedApplication,
     PublishedApplicationBiblio,
 )
+from . import manager as manager_module
+from .manager import CapacityException, PublicSearchBiblioManager
 
 
 class TestPatents:
@@ -188,3 +196,118 @@ class TestPublishedApplicationFullTextAsync:
             counter += 1
             assert p != old_p
         assert counter >= 525
+
+
+class FakeSearch:
+    """A stand-in for PublicSearchApi searches over ``docs``, which honours date ranges"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = list()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def find(self, query, sources=None):
+        self.queries.append(query)
+        match = re.search(r"@PD>=(\d{8})<=(\d{8})", query)
+        numbers = re.findall(r'"(\w+)"', query)
+        return [
+            d
+            for d in self.docs
+            if (not match or match[1] <= d.publication_date <= match[2])
+            and (not numbers or d.publication_number in numbers)
+            and (sources is None or not hasattr(d, "type") or d.type in sources)
+        ]
+
+    def count(self, query, sources=None):
+        return len(self.find(query, sources))
+
+    def run_query(self, query, start=0, limit=500, sort=None, sources=None):
+        found = self.find(query, sources)
+        return SimpleNamespace(num_found=len(found), docs=found[start : start + limit])
+
+    def get_document(self, biblio):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return SimpleNamespace(guid=biblio.guid, full_text=True)
+
+
+@pytest.mark.no_vcr
+class TestCrawl:
+    # Three documents a day through 2000, and one that is listed on two dates
+    docs = [
+        SimpleNamespace(guid=f"US-{i}-B1", publication_date=f"2000{m:02d}{d:02d}")
+        for i, (m, d) in enumerate(
+            (m, d) for m in range(1, 13) for d in range(1, 29) for _ in range(3)
+        )
+    ] + [SimpleNamespace(guid="US-0-B1", publication_date="20000615")]
+
+    def test_crawl(self, monkeypatch):
+        search = FakeSearch(self.docs)
+        monkeypatch.setattr(manager_module, "public_search_api", search)
+        manager = (
+            PublicSearchBiblioManager()
+            .filter(query="test")
+            .option(crawl=100, concurrency=4, crawl_dates=(date(2000, 1, 1), date(2000, 12, 31)))
+        )
+        guids = [doc.guid for doc in manager]
+        assert sorted(guids) == sorted(f"US-{i}-B1" for i in range(1008))
+        assert all(q.startswith("(test) AND @PD>=") for q in search.queries)
+
+    def test_crawl_limit(self, monkeypatch):
+        monkeypatch.setattr(manager_module, "public_search_api", FakeSearch(self.docs))
+        manager = (
+            PublicSearchBiblioManager()
+            .filter(query="test")
+            .option(crawl=100, crawl_dates=(date(2000, 1, 1), date(2000, 12, 31)))
+        )
+        assert [doc.guid for doc in manager.offset(2).limit(3)] == [
+            "US-2-B1",
+            "US-3-B1",
+            "US-4-B1",
+        ]
+
+    def test_crawl_busy_day(self, monkeypatch):
+        docs = [
+            SimpleNamespace(guid=f"US-{i}-{type}", publication_date="20000101", type=type)
+            for type in ("USPAT", "US-PGPUB")
+            for i in range(5)
+        ]
+        search = FakeSearch(docs)
+        monkeypatch.setattr(manager_module, "public_search_api", search)
+        manager = (
+            PublicSearchBiblioManager()
+            .filter(query="test")
+            .option(crawl=5, crawl_dates=(date(2000, 1, 1), date(2000, 1, 1)))
+        )
+        # A day with more results than the crawl size is split by source
+        assert sorted([doc.guid for doc in manager]) == sorted(doc.guid for doc in docs)
+        # And a source that still has too many results raises
+        with pytest.raises(CapacityException):
+            [doc for doc in manager.option(crawl=4)]
+
+
+@pytest.mark.no_vcr
+class TestGetMany:
+    docs = [
+        SimpleNamespace(guid=f"US-{n}-B1", publication_number=str(n), publication_date="20000101")
+        for n in range(6000000, 6000010)
+    ]
+
+    def test_get_many_documents(self, monkeypatch):
+        search = FakeSearch(self.docs)
+        monkeypatch.setattr(manager_module, "public_search_api", search)
+        numbers = [str(n) for n in range(6000009, 5999999, -1)]
+        manager = Patent.objects.offset(3).limit(2)
+        results = [r for r in manager.get_many(numbers, concurrency=4)]
+        # One search for all of the numbers, whatever the manager's limit and offset
+        assert len(search.queries) == 1
+        assert [r.guid for r in results] == [f"US-{n}-B1" for n in numbers]
+        assert all(r.full_text for r in results)
+        # The documents are fetched concurrently
+        assert 1 < search.max_in_flight <= 4
@@ -0,0 +1,113 @@
+# ********************************************************************************
+# *         WARNING: This file is automatically generated by unasync.py.         *
+# *                             DO NOT MANUALLY EDIT                             *
+# *       Source File: patent_client/_async/uspto/public_search/session.py       *
+# ********************************************************************************
+
+import base64
+import json
+import logging
+import os
+import tempfile
+import time
+import typing as tp
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# How long a session is used for if its access token doesn't say when it expires
+DEFAULT_SESSION_TTL = 20 * 60
+# Sessions are replaced this long before they expire
+REFRESH_MARGIN = 60
+
+
+def token_expiry(token: str) -> tp.Optional[float]:
+    """The expiry time in the payload of a PPUBS access token, if it has one.
+    Tokens are either a JWT or just the base64 encoded JSON payload of one."""
+    try:
+        payload = token.split(".")[1] if token.count(".") == 2 else token
+        payload += "=" * (-len(payload) % 4)
+        expiry = json.loads(base64.urlsafe_b64decode(payload))["exp"]
+        return float(expiry) if expiry else None
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+@dataclass
+class PublicSearchSession:
+    case_id: int
+    access_token: str
+    cookies: tp.Dict[str, str]
+    expires_at: float
+
+    @classmethod
+    def create(
+        cls, case_id: int, access_token: str, cookies: tp.Dict[str, str]
+    ) -> "PublicSearchSession":
+        now = time.time()
+        expiry = token_expiry(access_token)
+        if expiry is None or expiry <= now:
+            expiry = now + DEFAULT_SESSION_TTL
+        return cls(case_id, access_token, cookies, expiry)
+
+    def is_fresh(self) -> bool:
+        """Whether the session can still be used, with a margin before it expires"""
+        return time.time() < self.expires_at - REFRESH_MARGIN
+
+    @property
+    def headers(self) -> tp.Dict[str, str]:
+        """The headers that send a request with this session"""
+        return {"X-Access-Token": self.access_token, **self.cookie_header(self.cookies)}
+
+    @staticmethod
+    def cookie_header(cookies: tp.Dict[str, str]) -> tp.Dict[str, str]:
+        if not cookies:
+            return dict()
+        return {"Cookie": "; ".join(f"{name}={value}" for name, value in cookies.items())}
+
+
+# Used offline, where no session can be started
+OFFLINE_SESSION = PublicSearchSession(case_id=0, access_token="", cookies=dict(), expires_at=0.0)
+
+
+class SessionStore:
+    """
+    Keeps the current PPUBS session in a JSON file, so that processes on the same machine
+    share one session instead of each starting their own.
+
+    Args:
+        path: The file to keep the session in. Defaults to ``ppubs_session.json`` in the
+            base directory
+    """
+
+    def __init__(self, path: tp.Optional[tp.Union[str, Path]] = None):
+        self._path = Path(path) if path is not None else None
+
+    @property
+    def path(self) -> Path:
+        if self._path is None:
+            from patent_client import BASE_DIR
+
+            self._path = BASE_DIR / "ppubs_session.json"
+        return self._path
+
+    def load(self) -> tp.Optional[PublicSearchSession]:
+        try:
+            return PublicSearchSession(**json.loads(self.path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, session: PublicSearchSession) -> None:
+        # Written to a temporary file and moved into place, so readers never see half a file
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=self.path.parent, prefix=".ppubs_session")
+            with os.fdopen(fd, "w") as f:
+                json.dump(asdict(session), f)
+            os.replace(temp, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save the PPUBS session to {self.path}: {e!r}")
+
+    def clear(self) -> None:
+        self.path.unlink(missing_ok=True)
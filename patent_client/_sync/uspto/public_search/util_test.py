@@ -0,0 +1,22 @@
+# ********************************************************************************
+# *         WARNING: This file is automatically generated by unasync.py.         *
+# *                             DO NOT MANUALLY EDIT                             *
+# *      Source File: patent_client/_async/uspto/public_search/util_test.py      *
+# ********************************************************************************
+
+import pytest
+
+from .util import number_key
+
+
+@pytest.mark.parametrize(
+    "number",
+    ["6095661", 6095661, "6,095,661", "US 6,095,661", "US6095661A", "us-6095661-b1"],
+)
+def test_number_key(number):
+    assert number_key(number) == "6095661"
+
+
+def test_number_key_keeps_design_prefix():
+    assert number_key("USD645062S") == "D645062"
+    assert number_key("US 2017/0260839 A1") == "20170260839"
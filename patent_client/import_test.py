@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+
+def loaded_modules(statement: str):
+    code = f"import json, sys\n{statement}\nprint(json.dumps(list(sys.modules)))"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+class TestLazyImport:
+    def test_import_is_lazy(self):
+        modules = loaded_modules("import patent_client")
+        assert not any(m.startswith("patent_client._sync.") for m in modules)
+        # Nor does it load the HTTP client and cache
+        for module in ("hishel", "httpx", "sqlite3", "anysqlite"):
+            assert module not in modules
+
+    def test_import_loads_only_the_requested_api(self):
+        modules = loaded_modules("from patent_client import Inpadoc")
+        assert "patent_client._sync.epo.ops.published.model" in modules
+        assert not any(m.startswith("patent_client._sync.uspto") for m in modules)
+
+
+class TestConfigure:
+    def test_import_has_no_side_effects(self, tmp_path):
+        base_dir = tmp_path / "patent_client"
+        code = (
+            "import patent_client\n"
+            "from patent_client import Inpadoc, Patent\n"
+            "import pathlib\n"
+            f"assert not pathlib.Path({str(base_dir)!r}).exists()\n"
+            "patent_client.configure()\n"
+            "patent_client.configure()\n"
+            "assert len(patent_client.logger.handlers) == 1\n"
+            "print(patent_client.CACHE_DIR)\n"
+        )
+        env = {**os.environ, "PATENT_CLIENT_BASE_DIR": str(base_dir)}
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+        )
+        assert result.stdout.strip() == str(base_dir / "cache")
+        assert (base_dir / "cache").is_dir()
+        assert (base_dir / "patent_client.log").exists()
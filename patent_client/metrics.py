@@ -0,0 +1,167 @@
+"""
+Cache effectiveness metrics
+
+Every request that passes through one of patent_client's cache transports is counted here,
+grouped by host and endpoint template. Endpoint templates are the URL path with document
+numbers and other identifiers replaced by ``{id}``, so that lookups of different documents
+from the same endpoint are counted together.
+
+>>> from patent_client import metrics
+>>> metrics.reset()
+>>> metrics.record("hit", "https://ppubs.uspto.gov/api/patents/highlight/US-6103599-A", 100)
+>>> metrics.snapshot()["ppubs.uspto.gov"]["/api/patents/highlight/{id}"]["hits"]
+1
+"""
+
+import re
+import threading
+import typing as tp
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+EVENTS = ("hit", "miss", "revalidated")
+VERSION_RE = re.compile(r"^(v\d+|\d+\.\d+)$")
+
+Hook = tp.Callable[[str, str, str, int, float], None]
+
+
+class EndpointMetrics:
+    __slots__ = (
+        "hits",
+        "misses",
+        "revalidated",
+        "bytes_from_cache",
+        "bytes_from_network",
+        "network_time",
+    )
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.bytes_from_cache = 0
+        self.bytes_from_network = 0
+        self.network_time = 0.0
+
+    def as_dict(self) -> tp.Dict[str, tp.Union[int, float]]:
+        network_requests = self.misses + self.revalidated
+        mean_latency = self.network_time / network_requests if network_requests else 0.0
+        requests = self.hits + network_requests
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidated": self.revalidated,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "bytes_from_cache": self.bytes_from_cache,
+            "bytes_from_network": self.bytes_from_network,
+            "network_time": self.network_time,
+            "time_saved": self.hits * mean_latency,
+        }
+
+
+_lock = threading.Lock()
+_metrics: tp.Dict[tp.Tuple[str, str], EndpointMetrics] = defaultdict(EndpointMetrics)
+_hooks: tp.List[Hook] = list()
+
+
+def endpoint_template(path: str) -> str:
+    """Replace identifier-like path segments (anything containing a digit) with ``{id}``"""
+    segments = [
+        "{id}" if any(c.isdigit() for c in segment) and not VERSION_RE.match(segment) else segment
+        for segment in path.split("/")
+    ]
+    return "/".join(segments)
+
+
+def record(event: str, url: str, nbytes: int, elapsed: float = 0.0) -> None:
+    """Record the outcome of one request
+
+    Args:
+        event: "hit" if the response came from the cache without touching the network,
+            "revalidated" if a stored response was confirmed with the server, and "miss"
+            if the response was fetched from the server
+        url: The request url
+        nbytes: Size of the response body
+        elapsed: Seconds spent on the network for this request
+    """
+    if event not in EVENTS:
+        raise ValueError(f"Unknown cache event {event!r}! Must be one of {EVENTS}")
+    parts = urlsplit(str(url))
+    host, endpoint = parts.hostname or "", endpoint_template(parts.path)
+    with _lock:
+        entry = _metrics[(host, endpoint)]
+        if event == "hit":
+            entry.hits += 1
+            entry.bytes_from_cache += nbytes
+        elif event == "revalidated":
+            entry.revalidated += 1
+            entry.bytes_from_cache += nbytes
+            entry.network_time += elapsed
+        else:
+            entry.misses += 1
+            entry.bytes_from_network += nbytes
+            entry.network_time += elapsed
+        hooks = list(_hooks)
+    for hook in hooks:
+        hook(event, host, endpoint, nbytes, elapsed)
+
+
+def snapshot() -> tp.Dict[str, tp.Dict[str, tp.Dict[str, tp.Union[int, float]]]]:
+    """Return the current metrics as ``{host: {endpoint: {metric: value}}}``
+
+    ``time_saved`` is an estimate: each cache hit is credited with the mean network time of
+    the requests to that endpoint that did go to the server.
+    """
+    result: tp.Dict[str, tp.Dict[str, tp.Dict[str, tp.Union[int, float]]]] = defaultdict(dict)
+    with _lock:
+        for (host, endpoint), entry in sorted(_metrics.items()):
+            result[host][endpoint] = entry.as_dict()
+    return dict(result)
+
+
+def reset() -> None:
+    """Clear all recorded metrics"""
+    with _lock:
+        _metrics.clear()
+
+
+def add_hook(hook: Hook) -> None:
+    """Call ``hook(event, host, endpoint, nbytes, elapsed)`` for every recorded request.
+
+    This can be used to feed an external metrics system, e.g. with prometheus_client:
+
+        requests = Counter("patent_client_cache", "Cache lookups", ["event", "host", "endpoint"])
+        metrics.add_hook(lambda event, host, endpoint, *_: requests.labels(event, host, endpoint).inc())
+    """
+    with _lock:
+        _hooks.append(hook)
+
+
+def remove_hook(hook: Hook) -> None:
+    with _lock:
+        _hooks.remove(hook)
+
+
+def to_prometheus() -> str:
+    """Render the current metrics in the Prometheus text exposition format"""
+    lines = [
+        "# TYPE patent_client_cache_requests_total counter",
+        "# TYPE patent_client_cache_bytes_total counter",
+        "# TYPE patent_client_cache_network_seconds_total counter",
+    ]
+    for host, endpoints in snapshot().items():
+        for endpoint, values in endpoints.items():
+            labels = f'host="{host}",endpoint="{endpoint}"'
+            for event, key in (("hit", "hits"), ("miss", "misses"), ("revalidated", "revalidated")):
+                lines.append(
+                    f'patent_client_cache_requests_total{{{labels},event="{event}"}} {values[key]}'
+                )
+            for source in ("cache", "network"):
+                lines.append(
+                    f'patent_client_cache_bytes_total{{{labels},source="{source}"}} '
+                    f"{values[f'bytes_from_{source}']}"
+                )
+            lines.append(
+                f"patent_client_cache_network_seconds_total{{{labels}}} {values['network_time']}"
+            )
+    return "\n".join(lines) + "\n"
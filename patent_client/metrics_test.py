@@ -0,0 +1,80 @@
+import pytest
+
+from patent_client import metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+class TestCacheMetrics:
+    def test_endpoint_template(self):
+        assert (
+            metrics.endpoint_template("/api/patents/highlight/US-6103599-A")
+            == "/api/patents/highlight/{id}"
+        )
+        assert (
+            metrics.endpoint_template(
+                "/3.2/rest-services/published-data/publication/docdb/EP.1000000.A1/biblio"
+            )
+            == "/3.2/rest-services/published-data/publication/docdb/{id}/biblio"
+        )
+        assert (
+            metrics.endpoint_template("/v1/patent/applications/search")
+            == "/v1/patent/applications/search"
+        )
+
+    def test_snapshot(self):
+        metrics.record(
+            "miss", "https://ppubs.uspto.gov/api/patents/highlight/US-6103599-A", 100, 2.0
+        )
+        metrics.record("hit", "https://ppubs.uspto.gov/api/patents/highlight/US-7000000-B2", 200)
+        metrics.record(
+            "revalidated", "https://ppubs.uspto.gov/api/patents/highlight/US-7000000-B2", 200, 1.0
+        )
+        metrics.record(
+            "hit", "https://ops.epo.org/3.2/rest-services/family/publication/docdb/EP.1", 50
+        )
+        snapshot = metrics.snapshot()
+        ppubs = snapshot["ppubs.uspto.gov"]["/api/patents/highlight/{id}"]
+        assert ppubs["hits"] == 1
+        assert ppubs["misses"] == 1
+        assert ppubs["revalidated"] == 1
+        assert ppubs["bytes_from_cache"] == 400
+        assert ppubs["bytes_from_network"] == 100
+        assert ppubs["network_time"] == 3.0
+        assert ppubs["time_saved"] == 1.5
+        assert (
+            snapshot["ops.epo.org"]["/3.2/rest-services/family/publication/docdb/{id}"]["hit_rate"]
+            == 1.0
+        )
+        metrics.reset()
+        assert metrics.snapshot() == dict()
+
+    def test_unknown_event(self):
+        with pytest.raises(ValueError):
+            metrics.record("stale", "https://example.com", 0)
+
+    def test_hooks(self):
+        events = list()
+        hook = lambda *args: events.append(args)  # noqa: E731
+        metrics.add_hook(hook)
+        metrics.record("hit", "https://example.com/documents/123", 10)
+        metrics.remove_hook(hook)
+        metrics.record("hit", "https://example.com/documents/123", 10)
+        assert events == [("hit", "example.com", "/documents/{id}", 10, 0.0)]
+
+    def test_prometheus(self):
+        metrics.record("miss", "https://example.com/documents/123", 10, 0.5)
+        text = metrics.to_prometheus()
+        assert (
+            'patent_client_cache_requests_total{host="example.com",endpoint="/documents/{id}",event="miss"} 1'
+            in text
+        )
+        assert (
+            'patent_client_cache_bytes_total{host="example.com",endpoint="/documents/{id}",source="network"} 10'
+            in text
+        )
@@ -1,42 +1,29 @@
 import re
 import typing as tp
 import warnings
-from hashlib import blake2b
+from contextlib import contextmanager
 from pathlib import Path
 
 import hishel
-import httpcore
 import httpx
-from hishel._utils import normalized_url
 
-from patent_client import CACHE_DIR
+from patent_client._async.cache import MeteredCacheTransport, build_cache_storage
+from patent_client._async.http_client import LazyTransport, cache_key_generator
 from patent_client.version import __version__
 
 filename_re = re.compile(r'filename="([^"]+)"')
 
 
-def cache_key_generator(request: httpcore.Request):
-    encoded_url = normalized_url(request.url).encode("ascii")
-    body = [c for c in request.stream]
-    if isinstance(body[0], bytes):
-        body = b"".join(body)
-    else:
-        body = "".join(body).encode("utf-8")
-    key = blake2b(digest_size=16)
-    key.update(encoded_url)
-    key.update(request.method)
-    key.update(body)
-    return key.hexdigest()
-
-
-patent_client_transport = hishel.AsyncCacheTransport(
-    transport=httpx.AsyncHTTPTransport(
-        verify=False,
-        http2=True,
-        retries=3,
-    ),
-    storage=hishel.AsyncFileStorage(base_path=CACHE_DIR),
-    controller=hishel.Controller(allow_heuristics=True, key_generator=cache_key_generator),
+patent_client_transport = LazyTransport(
+    lambda: MeteredCacheTransport(
+        transport=httpx.AsyncHTTPTransport(
+            verify=False,
+            http2=True,
+            retries=3,
+        ),
+        storage=build_cache_storage(),
+        controller=hishel.Controller(allow_heuristics=True, key_generator=cache_key_generator),
+    )
 )
 
 
@@ -51,6 +38,22 @@ class PatentClientAsyncSession(httpx.AsyncClient):
         kwargs["follow_redirects"] = kwargs.get("follow_redirects", True)
         kwargs["timeout"] = kwargs.get("timeout", 60 * 5)
         super().__init__(**kwargs)
+        self.cache_only = False
+
+    @contextmanager
+    def offline(self):
+        """Serve every request made with this session from the cache. Cache misses raise CacheMissError"""
+        previous, self.cache_only = self.cache_only, True
+        try:
+            yield self
+        finally:
+            self.cache_only = previous
+
+    def build_request(self, *args, **kwargs) -> httpx.Request:
+        request = super().build_request(*args, **kwargs)
+        if self.cache_only:
+            request.extensions["cache_only"] = True
+        return request
 
     def get_filename(self, url, path, filename, headers):
         if path.is_dir() or None:
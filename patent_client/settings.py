@@ -1,15 +1,107 @@
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import Field
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class CachePolicy(BaseModel):
+    """Caching rule for requests whose URL matches the ``pattern`` regex.
+
+    Modes:
+        immutable: Cache forever and never revalidate
+        ttl: Serve from the cache for ``ttl`` seconds without revalidation, then refetch
+        revalidate: Cache, but revalidate with the server every time the response is used
+        no-store: Never cache
+    """
+
+    pattern: str
+    mode: Literal["immutable", "ttl", "revalidate", "no-store"] = "ttl"
+    ttl: Optional[int] = None
+    methods: List[str] = ["GET", "HEAD"]
+
+
+ONE_HOUR = 60 * 60
+ONE_DAY = 24 * ONE_HOUR
+
+DEFAULT_CACHE_POLICIES = [
+    CachePolicy(
+        pattern=r"^https?://ops\.epo\.org/[\d.]+/rest-services/number-service/", mode="immutable"
+    ),
+    CachePolicy(pattern=r"^https?://ops\.epo\.org/[\d.]+/rest-services/", ttl=3 * ONE_DAY),
+    # The sync client still uses the older dirsearch-public paths
+    CachePolicy(
+        pattern=r"^https://ppubs\.uspto\.gov/(api|dirsearch-public)/searches/counts",
+        ttl=ONE_HOUR,
+        methods=["POST"],
+    ),
+    CachePolicy(
+        pattern=r"^https://ppubs\.uspto\.gov/(api|dirsearch-public)/searches/searchWithBeFamily",
+        ttl=ONE_HOUR,
+        methods=["POST"],
+    ),
+    CachePolicy(pattern=r"^https://developer\.uspto\.gov/ptab-api/proceedings", ttl=ONE_DAY),
+]
+
+# Request fields that are specific to a session and don't change the response, by URL regex.
+# They are left out of cache keys, so that the same request made from another session can be
+# served from the cache. Headers aren't part of cache keys, so header names have no effect.
+DEFAULT_VOLATILE_FIELDS = {
+    r"^https://ppubs\.uspto\.gov/": ["caseId", "queryId", "X-Access-Token"],
+}
+
+
+class RetryPolicy(BaseModel):
+    """Retry rule for requests to hosts matching the ``host`` regex.
+
+    Requests are attempted up to ``attempts`` times, with full-jitter exponential backoff
+    starting at ``backoff`` seconds. Requests whose method is not in ``methods`` are treated as
+    non-idempotent, and are only retried if they never reached the server or were rejected
+    with a 429. Retries to a host are limited by a budget that is refilled by ``budget_ratio``
+    for every request, plus ``budget_per_second`` every second, up to ``budget_burst``.
+    """
+
+    host: str = ".*"
+    attempts: int = 4
+    backoff: float = 1.0
+    max_backoff: float = 30.0
+    statuses: List[int] = [429, 500, 502, 503, 504]
+    methods: List[str] = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]
+    budget_ratio: float = 0.2
+    budget_per_second: float = 1.0
+    budget_burst: float = 10.0
+
+
+DEFAULT_RETRY_POLICIES = [
+    # PPUBS searches are POSTs, but they don't change anything on the server
+    RetryPolicy(
+        host=r"^ppubs\.uspto\.gov$",
+        backoff=4.0,
+        methods=["GET", "HEAD", "POST"],
+    ),
+    RetryPolicy(),
+]
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="patent_client_")
     base_dir: Path = Field(default=Path("~/.patent_client").expanduser())
     log_file: str = Field(default="patent_client.log")
     log_level: str = Field(default="INFO")
+    cache_backend: str = Field(default="sqlite")
+    cache_max_bytes: Optional[int] = Field(default=2 * 1024**3)
+    cache_compression: bool = Field(default=False)
+    cache_policies: List[CachePolicy] = Field(default=DEFAULT_CACHE_POLICIES)
+    cache_volatile_fields: Dict[str, List[str]] = Field(default=DEFAULT_VOLATILE_FIELDS)
+    offline: bool = Field(default=False)
+    http2: bool = Field(default=True)
+    http_max_connections: Optional[int] = Field(default=100)
+    http_max_keepalive_connections: Optional[int] = Field(default=20)
+    http_keepalive_expiry: Optional[float] = Field(default=5.0)
+    # Requests per second, by host. Hosts without an entry are only limited by the rate limit
+    # headers they send back
+    rate_limits: Dict[str, float] = Field(default=dict())
+    retry_policies: List[RetryPolicy] = Field(default=DEFAULT_RETRY_POLICIES)
     epo_api_key: Optional[str] = Field(default=None)
     epo_api_secret: Optional[str] = Field(default=None)
     itc_username: Optional[str] = Field(default=None)
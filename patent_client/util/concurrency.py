@@ -0,0 +1,108 @@
+import asyncio
+import typing as tp
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+T = tp.TypeVar("T")
+R = tp.TypeVar("R")
+
+
+async def gather_map(
+    func: tp.Callable[[T], tp.Awaitable[R]],
+    items: tp.Iterable[T],
+    concurrency: tp.Optional[int] = None,
+    return_exceptions: bool = False,
+) -> tp.List[tp.Union[R, BaseException]]:
+    """Await ``func(item)`` for every item, at most ``concurrency`` at a time.
+    Results are returned in the order of ``items``.
+
+    unasync rewrites this to ``thread_map`` in the sync tree.
+    """
+    semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+    async def run(item):
+        if semaphore is None:
+            return await func(item)
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=return_exceptions)
+
+
+def thread_map(
+    func: tp.Callable[[T], R],
+    items: tp.Iterable[T],
+    concurrency: tp.Optional[int] = None,
+    return_exceptions: bool = False,
+) -> tp.List[tp.Union[R, BaseException]]:
+    """Call ``func(item)`` for every item on a thread pool of ``concurrency`` threads.
+    Results are returned in the order of ``items``."""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = [pool.submit(func, item) for item in items]
+    if not return_exceptions:
+        return [future.result() for future in futures]
+    return [future.exception() or future.result() for future in futures]
+
+
+async def ordered_map(
+    func: tp.Callable[[T], tp.Awaitable[R]],
+    items: tp.AsyncIterable[T],
+    concurrency: int,
+) -> tp.AsyncIterator[R]:
+    """Yield ``func(item)`` for every item, in the order of ``items``, with up to
+    ``concurrency`` calls running at once. ``items`` is consumed as results are yielded.
+
+    unasync rewrites this to ``thread_ordered_map`` in the sync tree.
+    """
+    if concurrency <= 1:
+        async for item in items:
+            yield await func(item)
+        return
+    pending: tp.Deque[asyncio.Future] = deque()
+    try:
+        async for item in items:
+            if len(pending) >= concurrency:
+                yield await pending.popleft()
+            pending.append(asyncio.ensure_future(func(item)))
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def thread_ordered_map(
+    func: tp.Callable[[T], R],
+    items: tp.Iterable[T],
+    concurrency: int,
+) -> tp.Iterator[R]:
+    """Yield ``func(item)`` for every item, in the order of ``items``, calling it on a thread
+    pool of ``concurrency`` threads. ``items`` is consumed as results are yielded."""
+    if concurrency <= 1:
+        yield from map(func, items)
+        return
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending: deque = deque()
+    try:
+        for item in items:
+            if len(pending) >= concurrency:
+                yield pending.popleft().result()
+            pending.append(executor.submit(func, item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_in_thread(func: tp.Callable[..., R], *args) -> R:
+    """Call ``func(*args)`` on a worker thread, so that blocking work like hashing a large
+    file doesn't stall the event loop.
+
+    unasync rewrites this to ``run_inline`` in the sync tree.
+    """
+    return await asyncio.to_thread(func, *args)
+
+
+def run_inline(func: tp.Callable[..., R], *args) -> R:
+    """Call ``func(*args)`` on the current thread"""
+    return func(*args)
@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from .concurrency import ordered_map, run_in_thread, thread_ordered_map
+
+
+class Counter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.running -= 1
+
+
+@pytest.mark.asyncio
+async def test_ordered_map():
+    counter = Counter()
+
+    async def items():
+        for i in range(20):
+            yield i
+
+    async def double(i):
+        with counter:
+            # Later items finish first
+            await asyncio.sleep(0.001 * (20 - i))
+        return i * 2
+
+    results = [r async for r in ordered_map(double, items(), concurrency=4)]
+    assert results == [i * 2 for i in range(20)]
+    assert counter.max_running == 4
+
+
+def test_thread_ordered_map():
+    counter = Counter()
+
+    def double(i):
+        with counter:
+            time.sleep(0.001 * (20 - i))
+        return i * 2
+
+    results = list(thread_ordered_map(double, iter(range(20)), concurrency=4))
+    assert results == [i * 2 for i in range(20)]
+    assert 1 < counter.max_running <= 4
+
+
+@pytest.mark.asyncio
+async def test_run_in_thread():
+    def thread_name():
+        time.sleep(0.01)
+        return threading.current_thread().name
+
+    names = await asyncio.gather(run_in_thread(thread_name), run_in_thread(thread_name))
+    assert threading.current_thread().name not in names
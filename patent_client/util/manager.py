@@ -1,25 +1,103 @@
 from __future__ import annotations
 
-from collections import OrderedDict
-from copy import deepcopy
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from copy import copy
 from enum import Enum
-from itertools import chain
-from typing import TYPE_CHECKING, AsyncIterator, Generic, Iterator, TypeVar, Union
+from itertools import chain, islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Generic,
+    Iterable,
+    Iterator,
+    Mapping,
+    TypeVar,
+    Union,
+)
 
 from typing_extensions import Self
 from yankee.data import Collection
 
+from .request_util import get_start_and_row_count
+
 if TYPE_CHECKING:
     pass
 
+logger = logging.getLogger(__name__)
+
 ModelType = TypeVar("ModelType")
 
+# Results of count(), by manager class and configuration, as (expiry time, count)
+_count_cache: dict[tuple, tuple[float, int]] = dict()
+_count_cache_lock = threading.Lock()
+
 
 class OrderDirection(str, Enum):
     ASC = "asc"
     DESC = "desc"
 
 
+def freeze(value):
+    """A hashable stand-in for a filter or option value, which may contain lists and dicts"""
+    if isinstance(value, Mapping):
+        return tuple(sorted(((k, freeze(v)) for k, v in value.items()), key=repr))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class FrozenDict(Mapping):
+    """A read-only, hashable dictionary. Changes are made by building a new one with ``set``"""
+
+    __slots__ = ("_data", "_hash")
+
+    def __init__(self, *args, **kwargs):
+        self._data = dict(*args, **kwargs)
+        self._hash = None
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = hash(freeze(self._data))
+        return self._hash
+
+    def __repr__(self):
+        return f"FrozenDict({self._data!r})"
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (FrozenDict, (self._data,))
+
+    def set(self, **changes) -> FrozenDict:
+        """Return a copy with ``changes`` applied"""
+        return FrozenDict({**self._data, **changes})
+
+
 class ManagerConfig:
     """
     Manager Configuration Class
@@ -27,92 +105,188 @@ class ManagerConfig:
     This class is designed to store and manage configuration settings for a manager object. It allows for the customization of query parameters and options to tailor data retrieval processes. The attributes of this class include:
 
     Attributes:
-        filter (OrderedDict[str, list]): An ordered dictionary to store filter conditions for queries. The keys represent the field names, and the values represent the filter criteria.
-        order_by (list[tuple[str, OrderDirection]]): A list of tuples specifying the ordering of query results. Each tuple contains a field name and the direction ('asc' for ascending, 'desc' for descending) of the sort.
-        options (dict[str, str]): A dictionary to store additional options that may affect the query or its results.
+        filter (FrozenDict[str, list]): An ordered mapping to store filter conditions for queries. The keys represent the field names, and the values represent the filter criteria.
+        order_by (tuple[str, ...]): The fields to order the query results by. A field is prefixed with '-' for descending order.
+        options (FrozenDict[str, Any]): A mapping to store additional options that may affect the query or its results.
         limit (int | None): An optional integer specifying the maximum number of results to return. If None, no limit is applied.
         offset (int): An integer specifying the offset from the start of the result set. Used for pagination.
-        annotations (list[tuple[str, str]]): A list of tuples for annotating the results with extra information. Each tuple contains a field name and an annotation.
+        annotations (tuple[tuple[str, str], ...]): Tuples for annotating the results with extra information. Each tuple contains a field name and an annotation.
 
-    The class also includes a method for comparing two `ManagerConfig` instances for equality based on their attributes.
+    Configurations are immutable. ``replace`` returns a new configuration that shares every
+    attribute it doesn't change with the original, so building a query never copies more than
+    the part that changed. Filter and option values are shared too, and must not be modified
+    in place. Equal configurations have equal hashes, so a configuration can be used as a key
+    for caching the results of a query.
     """
 
-    def __init__(self):
-        self.filter: OrderedDict[str, list] = OrderedDict()
-        self.order_by: list[tuple[str, OrderDirection]] = list()
-        self.options: dict[str, str] = dict()
-        self.limit: int | None = None
-        self.offset: int = 0
-        self.annotations: list[tuple[str, str]] = list()
+    __slots__ = ("filter", "order_by", "options", "limit", "offset", "annotations", "_hash")
+
+    def __init__(
+        self,
+        filter: Mapping[str, list] = FrozenDict(),
+        order_by: Iterable = (),
+        options: Mapping[str, Any] = FrozenDict(),
+        limit: int | None = None,
+        offset: int = 0,
+        annotations: Iterable[tuple[str, str]] = (),
+    ):
+        set_ = object.__setattr__
+        set_(self, "filter", filter if isinstance(filter, FrozenDict) else FrozenDict(filter))
+        set_(self, "order_by", tuple(order_by))
+        set_(self, "options", options if isinstance(options, FrozenDict) else FrozenDict(options))
+        set_(self, "limit", limit)
+        set_(self, "offset", offset)
+        set_(self, "annotations", tuple(annotations))
+        set_(self, "_hash", None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ManagerConfig is immutable, use replace({name}=...) instead")
+
+    def __delattr__(self, name):
+        raise AttributeError("ManagerConfig is immutable")
+
+    def replace(self, **changes) -> ManagerConfig:
+        """Return a new configuration with ``changes`` applied"""
+        return ManagerConfig(
+            filter=changes.get("filter", self.filter),
+            order_by=changes.get("order_by", self.order_by),
+            options=changes.get("options", self.options),
+            limit=changes.get("limit", self.limit),
+            offset=changes.get("offset", self.offset),
+            annotations=changes.get("annotations", self.annotations),
+        )
+
+    def _key(self) -> tuple:
+        return (self.filter, self.order_by, self.options, self.limit, self.offset, self.annotations)
 
     def __eq__(self, other):
+        if not isinstance(other, ManagerConfig):
+            return NotImplemented
+        return self is other or (hash(self) == hash(other) and self._key() == other._key())
+
+    def __hash__(self):
+        if self._hash is None:
+            object.__setattr__(
+                self,
+                "_hash",
+                hash(
+                    (
+                        self.filter,
+                        freeze(self.order_by),
+                        self.options,
+                        self.limit,
+                        self.offset,
+                        self.annotations,
+                    )
+                ),
+            )
+        return self._hash
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (ManagerConfig, self._key())
+
+    def __repr__(self):
         return (
-            self.filter == other.filter
-            and self.order_by == other.order_by
-            and self.options == other.options
-            and self.limit == other.limit
-            and self.offset == other.offset
-            and self.annotations == other.annotations
+            f"ManagerConfig(filter={dict(self.filter)!r}, order_by={self.order_by!r}, "
+            f"options={dict(self.options)!r}, limit={self.limit!r}, offset={self.offset!r})"
         )
 
 
 class BaseManager(Collection, Generic[ModelType]):
     default_filter: str = ""
+    page_size: int = 50
+    # Whether _get_page can fetch any page directly, which allows the fan_out option. fan_out
+    # relies on count() counting the results after the offset, up to the limit, like len()
+    random_access: bool = False
+    # How long the result of count() is reused for the same query, in seconds
+    count_ttl: float = 60.0
+    # How many ids _get_batch can look up in one request, or 0 if there is no batch endpoint
+    batch_size: int = 0
 
     def __init__(self, config=None):
         self.config = config or ManagerConfig()
 
+    def _count_key(self) -> tuple:
+        return (type(self), self.config)
+
+    def _get_cached_count(self) -> int | None:
+        with _count_cache_lock:
+            cached = _count_cache.get(self._count_key())
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        return None
+
+    def _set_cached_count(self, count: int) -> None:
+        now = time.monotonic()
+        with _count_cache_lock:
+            for key in [k for k, (expires, _) in _count_cache.items() if expires <= now]:
+                del _count_cache[key]
+            _count_cache[self._count_key()] = (now + self.count_ttl, count)
+
+    def _id_chunks(self, ids: Iterable) -> Iterator[list]:
+        """Split ``ids`` into the groups that get_many looks up together"""
+        ids = iter(ids)
+        size = self.batch_size or 1
+        while chunk := list(islice(ids, size)):
+            yield chunk
+
+    def _page_ranges(self) -> Iterator[tuple[int, int]]:
+        """The (start, rows) of each page of results"""
+        return get_start_and_row_count(self.config.limit, self.config.offset, self.page_size)
+
     def __eq__(self, other) -> bool:
         return bool(self.config == other.config and isinstance(self, type(other)))
 
+    def __hash__(self) -> int:
+        return hash((type(self), self.config))
+
     def __add__(self, other):
         return Collection(chain(self, other))
 
     # Manager Modification Functions
 
+    def _with_config(self, **changes) -> Self:
+        """A copy of this manager with ``changes`` applied to its configuration.
+
+        The copy is shallow, so it shares everything but the configuration with this manager.
+        """
+        mger = copy(self)
+        mger.config = self.config.replace(**changes)
+        return mger
+
     def filter(self, *args, **kwargs) -> Self:
         """Apply a new filtering condition"""
-        mger = deepcopy(self)
         if args:
             kwargs[self.default_filter] = args
 
+        filter = dict(self.config.filter)
         for key, value in kwargs.items():
-            if isinstance(value, (str, dict, int, float)):
-                kwargs[key] = [value]
-            else:
-                kwargs[key] = list(value)
+            value = [value] if isinstance(value, (str, dict, int, float)) else list(value)
+            filter[key] = [*filter[key], *value] if key in filter else value
 
-        for key, value in kwargs.items():
-            if key in mger.config.filter:
-                mger.config.filter[key].extend(value)
-            else:
-                mger.config.filter[key] = value
-
-        return mger
+        return self._with_config(filter=FrozenDict(filter))
 
     def order_by(self, *args) -> Self:
         """Specify the order that argument should be returned in"""
-        mger = deepcopy(self)
-        mger.config.order_by = args
-        return mger
+        return self._with_config(order_by=args)
 
     def option(self, **kwargs) -> Self:
         """Set a key:value option on the manager"""
-        mger = deepcopy(self)
-        mger.config.options = {**mger.config.options, **kwargs}
-        return mger
+        return self._with_config(options=self.config.options.set(**kwargs))
 
     def limit(self, limit) -> Self:
         """Limit the number of records that are returned"""
-        mger = deepcopy(self)
-        mger.config.limit = limit
-        return mger
+        return self._with_config(limit=limit)
 
     def offset(self, offset) -> Self:
         """Specify the number of records from the beginning from which to apply an offset"""
-        mger = deepcopy(self)
-        mger.config.offset = self.config.offset + offset
-        return mger
+        return self._with_config(offset=self.config.offset + offset)
 
     # Basic Manager Fetching
 
@@ -146,14 +320,86 @@ class Manager(BaseManager, Generic[ModelType]):
     def __iter__(self) -> Iterator[ModelType]:
         return self._get_results()
 
+    def _get_page(self, start: int, rows: int) -> list[ModelType]:
+        raise NotImplementedError(
+            f"This method must be defined in a subclass of {self.__class__.__name__}"
+        )
+
+    def _get_results(self) -> Iterator[ModelType]:
+        """Fetch the results page by page with ``_get_page``, until a page comes back short.
+
+        With ``.option(prefetch=n)``, the next ``n`` pages are fetched on a thread pool while
+        a page is being consumed. Managers whose backend accepts arbitrary offsets
+        (``random_access``) also support ``.option(fan_out=n)``, which gets the number of
+        results from ``count()`` and fetches the pages on ``n`` threads. Pages are yielded in
+        order unless ``.option(ordered=False)`` is also set.
+        """
+        options = self.config.options
+        fan_out = options.get("fan_out", 0)
+        if fan_out and self.random_access:
+            count = len(self)
+            ranges = (
+                get_start_and_row_count(count, self.config.offset, self.page_size)
+                if count > 0
+                else []
+            )
+            if options.get("ordered", True):
+                pages = self._iter_pages(ranges, fan_out)
+            else:
+                pages = self._iter_pages_unordered(ranges, fan_out)
+        else:
+            pages = self._iter_pages(self._page_ranges(), options.get("prefetch", 0) + 1)
+        for page in pages:
+            yield from page
+
+    def _iter_pages(self, ranges: Iterable[tuple[int, int]], depth: int) -> Iterator[list]:
+        """Yield pages in order, with up to ``depth`` of them being fetched at once"""
+        if depth <= 1:
+            for start, rows in ranges:
+                page = self._get_page(start, rows)
+                yield page
+                if len(page) < rows:
+                    return
+            return
+        executor = ThreadPoolExecutor(max_workers=depth)
+        ranges = iter(ranges)
+        pending: deque = deque()
+        try:
+            while True:
+                for start, rows in islice(ranges, depth - len(pending)):
+                    pending.append((rows, executor.submit(self._get_page, start, rows)))
+                if not pending:
+                    return
+                rows, future = pending.popleft()
+                page = future.result()
+                yield page
+                if len(page) < rows:
+                    return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _iter_pages_unordered(
+        self, ranges: Iterable[tuple[int, int]], concurrency: int
+    ) -> Iterator[list]:
+        """Yield pages as they arrive, with up to ``concurrency`` of them being fetched at once"""
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        futures = [executor.submit(self._get_page, start, rows) for start, rows in ranges]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def __getitem__(self, key: Union[slice, int]) -> Union[Manager[ModelType], ModelType]:
         if isinstance(key, slice):
             if key.step is not None:
                 raise AttributeError("Step is not supported")
             start = key.start if key.start else 0
-            start = len(self) + start if start < 0 else start
-            stop = key.stop if key.stop else len(self)
-            stop = len(self) + stop if stop < 0 else stop
+            stop = key.stop if key.stop else None
+            if start < 0 or stop is None or stop < 0:
+                count = len(self)
+                start = count + start if start < 0 else start
+                stop = count if stop is None else count + stop if stop < 0 else stop
             mger = self.offset(start + self.config.offset)
             mger = mger.limit(stop - start)
             return mger
@@ -162,11 +408,19 @@ class Manager(BaseManager, Generic[ModelType]):
     # Basic Manager Attributes
 
     def __len__(self) -> int:
-        return self.count()
+        # count() usually costs a request, so the result is reused for count_ttl seconds
+        count = self._get_cached_count()
+        if count is None:
+            count = self.count()
+            self._set_cached_count(count)
+        return count
 
     def __eq__(self, other) -> bool:
         return bool(self.config == other.config and isinstance(self, type(other)))
 
+    def __hash__(self) -> int:
+        return hash((type(self), self.config))
+
     def __add__(self, other):
         return Collection(chain(self, other))
 
@@ -184,6 +438,57 @@ class Manager(BaseManager, Generic[ModelType]):
             raise ValueError("No documents found!")
         return mger.first()
 
+    def _get_batch(self, ids: list) -> dict:
+        """Look up several ids in one request, and return the results that were found by id.
+        Only used by managers that set ``batch_size``"""
+        raise NotImplementedError(
+            f"This method must be defined in a subclass of {self.__class__.__name__}"
+        )
+
+    def get_many(
+        self, ids: Iterable, concurrency: int = 8, return_exceptions: bool = True
+    ) -> Iterator[ModelType | Exception]:
+        """Look up each of ``ids`` with ``get``, and yield the results in the order of ``ids``.
+
+        Up to ``concurrency`` lookups run at once on a thread pool. Each result is yielded as
+        soon as it and every result before it are ready. Managers with a batch endpoint
+        (``batch_size``) look the ids up that many at a time, and fall back to ``get`` for any
+        id the batch didn't find. A failed lookup yields its exception in place of a result,
+        or raises it if ``return_exceptions`` is False.
+        """
+        chunks = self._id_chunks(ids)
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending: deque = deque()
+        try:
+            while True:
+                # Queue a few chunks past the ones being fetched, so a slow lookup doesn't
+                # leave the pool idle
+                for chunk in islice(chunks, 2 * concurrency - len(pending)):
+                    pending.append(executor.submit(self._get_chunk, chunk))
+                if not pending:
+                    return
+                for result in pending.popleft().result():
+                    if isinstance(result, Exception) and not return_exceptions:
+                        raise result
+                    yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_chunk(self, ids: list) -> list[ModelType | Exception]:
+        found = dict()
+        if self.batch_size:
+            try:
+                found = self._get_batch(ids)
+            except Exception as e:
+                logger.warning(f"Batch lookup failed, looking ids up one at a time: {e!r}")
+        return [found[id] if id in found else self._try_get(id) for id in ids]
+
+    def _try_get(self, id) -> ModelType | Exception:
+        try:
+            return self.get(id)
+        except Exception as e:
+            return e
+
 
 class AsyncManager(BaseManager, Generic[ModelType]):
     """
@@ -206,20 +511,88 @@ class AsyncManager(BaseManager, Generic[ModelType]):
     def __aiter__(self) -> AsyncIterator[ModelType]:
         return self._get_results()
 
-    async def _get_results(self) -> AsyncIterator[ModelType]:
+    async def _get_page(self, start: int, rows: int) -> list[ModelType]:
         raise NotImplementedError(
             f"This method must be defined in a subclass of {self.__class__.__name__}"
         )
 
+    async def _get_results(self) -> AsyncIterator[ModelType]:
+        """Fetch the results page by page with ``_get_page``, until a page comes back short.
+
+        With ``.option(prefetch=n)``, the next ``n`` pages are fetched while a page is being
+        consumed. Managers whose backend accepts arbitrary offsets (``random_access``) also
+        support ``.option(fan_out=n)``, which gets the number of results from ``count()`` and
+        fetches up to ``n`` pages at once. Pages are yielded in order unless
+        ``.option(ordered=False)`` is also set.
+        """
+        options = self.config.options
+        fan_out = options.get("fan_out", 0)
+        if fan_out and self.random_access:
+            count = await self.len()
+            ranges = (
+                get_start_and_row_count(count, self.config.offset, self.page_size)
+                if count > 0
+                else []
+            )
+            if options.get("ordered", True):
+                pages = self._iter_pages(ranges, fan_out)
+            else:
+                pages = self._iter_pages_unordered(ranges, fan_out)
+        else:
+            pages = self._iter_pages(self._page_ranges(), options.get("prefetch", 0) + 1)
+        async for page in pages:
+            for item in page:
+                yield item
+
+    async def _iter_pages(
+        self, ranges: Iterable[tuple[int, int]], depth: int
+    ) -> AsyncIterator[list]:
+        """Yield pages in order, with up to ``depth`` of them being fetched at once"""
+        ranges = iter(ranges)
+        pending: deque = deque()
+        try:
+            while True:
+                for start, rows in islice(ranges, depth - len(pending)):
+                    pending.append((rows, asyncio.ensure_future(self._get_page(start, rows))))
+                if not pending:
+                    return
+                rows, task = pending.popleft()
+                page = await task
+                yield page
+                if len(page) < rows:
+                    return
+        finally:
+            for _, task in pending:
+                task.cancel()
+
+    async def _iter_pages_unordered(
+        self, ranges: Iterable[tuple[int, int]], concurrency: int
+    ) -> AsyncIterator[list]:
+        """Yield pages as they arrive, with up to ``concurrency`` of them being fetched at once"""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(start, rows):
+            async with semaphore:
+                return await self._get_page(start, rows)
+
+        tasks = [asyncio.ensure_future(fetch(start, rows)) for start, rows in ranges]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def __getitem__(self, key: Union[slice, int]) -> Union[Manager[ModelType], ModelType]:
         if isinstance(key, slice):
             if key.step is not None:
                 raise AttributeError("Step is not supported")
-            count = await self.count()
             start = key.start if key.start else 0
-            start = count + start if start < 0 else start
-            stop = key.stop if key.stop else count
-            stop = count + stop if stop < 0 else stop
+            stop = key.stop if key.stop else None
+            if start < 0 or stop is None or stop < 0:
+                count = await self.len()
+                start = count + start if start < 0 else start
+                stop = count if stop is None else count + stop if stop < 0 else stop
             mger = self.offset(start + self.config.offset)
             mger = mger.limit(stop - start)
             return mger
@@ -239,8 +612,13 @@ class AsyncManager(BaseManager, Generic[ModelType]):
         )
 
     async def len(self) -> int:
-        """Returns number of records in the QuerySet. Alias for self.count()"""
-        return await self.count()
+        """Returns number of records in the QuerySet. Like self.count(), but the result is
+        reused for count_ttl seconds"""
+        count = self._get_cached_count()
+        if count is None:
+            count = await self.count()
+            self._set_cached_count(count)
+        return count
 
     async def first(self) -> ModelType:
         """Get the first object in the manager"""
@@ -253,13 +631,72 @@ class AsyncManager(BaseManager, Generic[ModelType]):
     async def get(self, *args, **kwargs) -> ModelType:
         """If the critera results in a single record, return it, else raise an exception"""
         mger = self.filter(*args, **kwargs)
-        length = await mger.count()
+        length = await mger.len()
         if length > 1:
             raise ValueError("More than one document found!")
         if length == 0:
             raise ValueError("No documents found!")
         return await mger.first()
 
+    async def _get_batch(self, ids: list) -> dict:
+        """Look up several ids in one request, and return the results that were found by id.
+        Only used by managers that set ``batch_size``"""
+        raise NotImplementedError(
+            f"This method must be defined in a subclass of {self.__class__.__name__}"
+        )
+
+    async def get_many(
+        self, ids: Iterable, concurrency: int = 8, return_exceptions: bool = True
+    ) -> AsyncIterator[ModelType | Exception]:
+        """Look up each of ``ids`` with ``get``, and yield the results in the order of ``ids``.
+
+        Up to ``concurrency`` lookups run at once. Each result is yielded as soon as it and
+        every result before it are ready. Managers with a batch endpoint (``batch_size``) look
+        the ids up that many at a time, and fall back to ``get`` for any id the batch didn't
+        find. A failed lookup yields its exception in place of a result, or raises it if
+        ``return_exceptions`` is False.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        chunks = self._id_chunks(ids)
+        pending: deque = deque()
+        try:
+            while True:
+                # Queue a few chunks past the ones being fetched, so a slow lookup doesn't
+                # hold up the ones behind it
+                for chunk in islice(chunks, 2 * concurrency - len(pending)):
+                    pending.append(asyncio.ensure_future(self._get_chunk(chunk, semaphore)))
+                if not pending:
+                    return
+                for result in await pending.popleft():
+                    if isinstance(result, Exception) and not return_exceptions:
+                        raise result
+                    yield result
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _get_chunk(
+        self, ids: list, semaphore: asyncio.Semaphore
+    ) -> list[ModelType | Exception]:
+        found = dict()
+        if self.batch_size:
+            try:
+                async with semaphore:
+                    found = await self._get_batch(ids)
+            except Exception as e:
+                logger.warning(f"Batch lookup failed, looking ids up one at a time: {e!r}")
+
+        async def try_get(id):
+            try:
+                async with semaphore:
+                    return await self.get(id)
+            except Exception as e:
+                return e
+
+        missing = [id for id in ids if id not in found]
+        found.update(zip(missing, await asyncio.gather(*(try_get(id) for id in missing))))
+        return [found[id] for id in ids]
+
     async def to_list(self) -> list[ModelType]:
         """Return a list of all objects in the manager"""
         return [item async for item in self]
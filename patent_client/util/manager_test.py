@@ -0,0 +1,301 @@
+import asyncio
+import pickle
+import threading
+import time
+
+import pytest
+
+from .manager import AsyncManager, Manager, ManagerConfig
+
+
+class AsyncNumberManager(AsyncManager[int]):
+    """Serves the numbers 0 to total - 1, recording the page requests it gets"""
+
+    page_size = 10
+    total = 35
+    random_access = True
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.requests = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def count(self):
+        self.requests.append("count")
+        count = self.total - self.config.offset
+        return min(self.config.limit, count) if self.config.limit else count
+
+    async def _get_page(self, start, rows):
+        self.requests.append(start)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return list(range(start, min(start + rows, self.total)))
+
+
+lock = threading.Lock()
+
+
+class NumberManager(Manager[int]):
+    page_size = 10
+    total = 35
+    random_access = True
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.requests = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def count(self):
+        self.requests.append("count")
+        count = self.total - self.config.offset
+        return min(self.config.limit, count) if self.config.limit else count
+
+    def _get_page(self, start, rows):
+        with lock:
+            self.requests.append(start)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with lock:
+            self.in_flight -= 1
+        return list(range(start, min(start + rows, self.total)))
+
+
+class TestAsyncPaging:
+    @pytest.mark.asyncio
+    async def test_sequential(self):
+        manager = AsyncNumberManager()
+        assert await manager.to_list() == list(range(35))
+        assert manager.requests == [0, 10, 20, 30]
+        assert manager.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_prefetch(self):
+        manager = AsyncNumberManager().option(prefetch=2)
+        assert await manager.to_list() == list(range(35))
+        assert manager.max_in_flight == 3
+        # Pages past the end may be requested, but their results are never yielded
+        assert manager.requests[:4] == [0, 10, 20, 30]
+
+    @pytest.mark.asyncio
+    async def test_limit_and_offset(self):
+        manager = AsyncNumberManager().offset(5).limit(12).option(prefetch=2)
+        assert await manager.to_list() == list(range(5, 17))
+        assert manager.requests == [5, 15]
+
+    @pytest.mark.asyncio
+    async def test_fan_out(self):
+        manager = AsyncNumberManager().option(fan_out=4)
+        assert await manager.to_list() == list(range(35))
+        assert manager.requests == ["count", 0, 10, 20, 30]
+        assert manager.max_in_flight == 4
+
+    @pytest.mark.asyncio
+    async def test_fan_out_unordered(self):
+        manager = AsyncNumberManager().offset(3).option(fan_out=2, ordered=False)
+        assert sorted(await manager.to_list()) == list(range(3, 35))
+        assert manager.max_in_flight == 2
+
+    @pytest.mark.asyncio
+    async def test_count_is_memoized(self, monkeypatch):
+        manager = AsyncNumberManager().filter(query="memoized")
+        assert await manager.len() == 35
+        sliced = await manager[-10:]
+        assert sliced.config.offset == 25
+        assert await manager.len() == 35
+        assert manager.requests == ["count"]
+        # Another query is counted separately. Derived managers share the request log
+        other = manager.filter(query="other")
+        assert await other.len() == 35
+        assert manager.requests == ["count", "count"]
+        monkeypatch.setattr(AsyncNumberManager, "count_ttl", 0)
+        expired = manager.filter(query="expired")
+        await expired.len()
+        await expired.len()
+        assert manager.requests == ["count", "count", "count", "count"]
+
+
+class TestSyncPaging:
+    def test_sequential(self):
+        manager = NumberManager()
+        # list() asks for len() as a size hint
+        assert list(manager) == list(range(35))
+        assert [r for r in manager.requests if r != "count"] == [0, 10, 20, 30]
+        assert manager.max_in_flight == 1
+
+    def test_prefetch(self):
+        manager = NumberManager().option(prefetch=2)
+        assert list(manager) == list(range(35))
+        assert manager.max_in_flight > 1
+        assert sorted(r for r in manager.requests if r != "count")[:4] == [0, 10, 20, 30]
+
+    def test_fan_out(self):
+        manager = NumberManager().limit(25).option(fan_out=3)
+        assert list(manager) == list(range(25))
+        assert manager.requests[0] == "count"
+        assert sorted(manager.requests[1:]) == [0, 10, 20]
+
+    def test_fan_out_unordered(self):
+        manager = NumberManager().option(fan_out=4, ordered=False)
+        assert sorted(manager) == list(range(35))
+
+    def test_count_is_memoized(self):
+        manager = NumberManager().filter(query="memoized")
+        assert len(manager) == 35
+        assert manager[-10:].config.offset == 25
+        assert manager[5:-5].config.limit == 25
+        assert len(manager) == 35
+        assert manager.requests == ["count"]
+
+
+class TestManagerConfig:
+    def test_config_is_immutable(self):
+        config = ManagerConfig()
+        with pytest.raises(AttributeError):
+            config.limit = 5
+        with pytest.raises(TypeError):
+            config.options["sources"] = ["USPAT"]
+
+    def test_modifiers_share_unchanged_state(self):
+        manager = NumberManager().filter(query="shared").option(prefetch=2)
+        limited = manager.limit(5)
+        assert manager.config.limit is None
+        assert limited.config.limit == 5
+        assert limited.config.filter is manager.config.filter
+        assert limited.config.options is manager.config.options
+        # The manager itself is copied shallowly, not deep copied
+        assert limited.requests is manager.requests
+
+    def test_filter_copies_on_write(self):
+        manager = NumberManager().filter(query="a")
+        extended = manager.filter(query="b")
+        assert manager.config.filter["query"] == ["a"]
+        assert extended.config.filter["query"] == ["a", "b"]
+
+    def test_equal_configs_hash_equal(self):
+        a = NumberManager().filter(query={"q": "x", "fields": ["a"]}).option(prefetch=2).limit(5)
+        b = NumberManager().limit(5).option(prefetch=2).filter(query={"fields": ["a"], "q": "x"})
+        assert a.config == b.config
+        assert hash(a.config) == hash(b.config)
+        assert hash(a) == hash(b)
+        assert a.config != a.offset(1).config
+        assert len({a, b, a.offset(1)}) == 2
+
+    def test_pickle(self):
+        config = NumberManager().filter(query="a").order_by("-date").config
+        assert pickle.loads(pickle.dumps(config)) == config
+
+
+class AsyncLookupManager(AsyncManager[int]):
+    """Looks up n as n * 10. Negative numbers aren't found"""
+
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.lookups = list()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def get(self, id):
+        self.lookups.append(id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # Later ids finish first
+        await asyncio.sleep(0.001 * (20 - id % 20))
+        self.in_flight -= 1
+        if id < 0:
+            raise ValueError("No documents found!")
+        return id * 10
+
+
+class AsyncBatchLookupManager(AsyncLookupManager):
+    """Has a batch endpoint that only finds even numbers"""
+
+    batch_size = 4
+
+    async def _get_batch(self, ids):
+        self.lookups.append(tuple(ids))
+        return {id: id * 10 for id in ids if id % 2 == 0}
+
+
+class LookupManager(Manager[int]):
+    def __init__(self, config=None):
+        super().__init__(config)
+        self.lookups = list()
+
+    def get(self, id):
+        with lock:
+            self.lookups.append(id)
+        time.sleep(0.001 * (20 - id % 20))
+        if id < 0:
+            raise ValueError("No documents found!")
+        return id * 10
+
+
+class BatchLookupManager(LookupManager):
+    batch_size = 4
+
+    def _get_batch(self, ids):
+        with lock:
+            self.lookups.append(tuple(ids))
+        return {id: id * 10 for id in ids if id % 2 == 0}
+
+
+class TestAsyncGetMany:
+    @pytest.mark.asyncio
+    async def test_results_are_in_order(self):
+        manager = AsyncLookupManager()
+        results = [r async for r in manager.get_many(range(30), concurrency=5)]
+        assert results == [i * 10 for i in range(30)]
+        assert manager.max_in_flight == 5
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_returned(self):
+        results = [r async for r in AsyncLookupManager().get_many([1, -1, 2])]
+        assert results[0] == 10 and results[2] == 20
+        assert isinstance(results[1], ValueError)
+
+    @pytest.mark.asyncio
+    async def test_exceptions_are_raised(self):
+        results = list()
+        with pytest.raises(ValueError):
+            async for result in AsyncLookupManager().get_many([1, -1, 2], return_exceptions=False):
+                results.append(result)
+        assert results == [10]
+
+    @pytest.mark.asyncio
+    async def test_batch_falls_back_to_get(self):
+        manager = AsyncBatchLookupManager()
+        results = [r async for r in manager.get_many(range(10), concurrency=2)]
+        assert results == [i * 10 for i in range(10)]
+        batches = [lookup for lookup in manager.lookups if isinstance(lookup, tuple)]
+        assert batches == [(0, 1, 2, 3), (4, 5, 6, 7), (8, 9)]
+        assert sorted(lookup for lookup in manager.lookups if isinstance(lookup, int)) == [
+            1,
+            3,
+            5,
+            7,
+            9,
+        ]
+
+
+class TestSyncGetMany:
+    def test_results_are_in_order(self):
+        results = list(LookupManager().get_many(range(30), concurrency=5))
+        assert results == [i * 10 for i in range(30)]
+
+    def test_exceptions(self):
+        results = list(LookupManager().get_many([1, -1, 2]))
+        assert results[0] == 10 and results[2] == 20
+        assert isinstance(results[1], ValueError)
+        with pytest.raises(ValueError):
+            list(LookupManager().get_many([1, -1, 2], return_exceptions=False))
+
+    def test_batch_falls_back_to_get(self):
+        manager = BatchLookupManager()
+        assert list(manager.get_many(range(10))) == [i * 10 for i in range(10)]
+        batches = sorted(lookup for lookup in manager.lookups if isinstance(lookup, tuple))
+        assert batches == [(0, 1, 2, 3), (4, 5, 6, 7), (8, 9)]
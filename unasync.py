@@ -23,12 +23,16 @@ SUBS = [
     ("AsyncByteStream", "ByteStream"),
     ("AsyncHTTPTransport", "HTTPTransport"),
     ("AsyncFileStorage", "FileStorage"),
+    ("AsyncBaseStorage", "BaseStorage"),
     ("AsyncCacheConnectionPool", "CacheConnectionPool"),
     ("handle_async_request", "handle_request"),
     ("aread", "read"),
     ("aclose", "close"),
     ("asleep", "sleep"),
     ("AsyncLock", "Lock"),
+    ("gather_map", "thread_map"),
+    ("ordered_map", "thread_ordered_map"),
+    ("run_in_thread", "run_inline"),
     (
         "from httpcore._async.interfaces import AsyncRequestInterface",
         "from httpcore._sync.interfaces import RequestInterface",